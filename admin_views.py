@@ -0,0 +1,311 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, abort, current_app, flash, jsonify, redirect, render_template, request, send_file, session, stream_template, url_for
+
+from models import db, BusinessInfo, Receipt, Job
+import archive
+import exports
+import http_cache
+import metrics
+import replica
+import request_logging
+import reporting
+from auth import ADMIN_USERNAME, ADMIN_PASSWORD, admin_required
+from extensions import business_info_cache, current_business_info, current_store, job_runner, live_broker, store_cache
+from localtime import local_day_start, local_today, to_local
+from receipt_views import PRINT_BATCH_SIZE, parse_date_arg
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/admin/login', methods=['GET', 'POST'])
+def admin_login():
+    """Admin login page"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        
+        if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+            session['admin_logged_in'] = True
+            flash('Successfully logged in!', 'success')
+            return redirect(url_for('admin.admin_panel'))
+        else:
+            flash('Invalid username or password.', 'error')
+    
+    return render_template('admin_login.html')
+
+@bp.route('/admin/logout')
+def admin_logout():
+    """Admin logout"""
+    session.pop('admin_logged_in', None)
+    flash('You have been logged out.', 'info')
+    return redirect(url_for('receipts.index'))
+
+@bp.route('/admin/store', methods=['POST'])
+@admin_required
+def select_store():
+    """Switch the store the admin works on (ignored on hosts tied to a store by STORE_HOSTS)"""
+    code = request.form.get('store', '').strip()
+    if code not in store_cache.get():
+        flash('Unknown store.', 'error')
+    else:
+        session['store_code'] = code
+    return redirect(url_for('admin.admin_panel'))
+
+def reports_version():
+    """ETag parts and Last-Modified of the store's reports.
+    
+    Besides the receipts, reports depend on the business information and
+    stores they show, and on the day: their default ranges end today.
+    """
+    version = http_cache.data_version(current_store().id)
+    today = local_today()
+    parts = (version[:3], today, current_business_info(), sorted(store_cache.get()))
+    return parts, http_cache.daily_last_modified(version.last_modified, local_day_start(today))
+
+@bp.route('/admin')
+@admin_required
+@replica.replica_reads
+@http_cache.conditional(reports_version)
+def admin_panel():
+    """Business administration panel"""
+    store = current_store()
+    business_info = current_business_info()
+    # Archiving moves receipts between tables; the count covers both
+    total_receipts = archive.count_receipts(store.id)
+    recent_receipts = (Receipt.query.filter(Receipt.store_id == store.id)
+                       .order_by(Receipt.date_created.desc()).limit(5).all())
+    
+    # All sales figures come from one grouped query
+    summary = reporting.dashboard_summary(store.id, local_today())
+    
+    return render_template('admin.html', 
+                         store=store,
+                         stores=list(store_cache.get().values()),
+                         business_info=business_info, 
+                         total_receipts=total_receipts, 
+                         recent_receipts=recent_receipts,
+                         today_sales=summary['today_sales'],
+                         yesterday_sales=summary['yesterday_sales'],
+                         week_sales=summary['week_sales'],
+                         month_sales=summary['month_sales'],
+                         daily_sales=summary['daily_sales'])
+
+@bp.route('/admin/live')
+@admin_required
+def live_sales():
+    """Server-Sent Events for open dashboards: today's totals, then each new or deleted receipt"""
+    # Each stream holds a worker thread; past the limit the rest stay free
+    # for other requests
+    subscription, totals = live_broker.subscribe(current_store().id, current_app.config['LIVE_MAX_STREAMS'])
+    if subscription is None:
+        events = live_broker.busy(current_app.config['LIVE_BUSY_RETRY_SECONDS'])
+    else:
+        events = live_broker.stream(subscription, totals, current_app.config['LIVE_HEARTBEAT_SECONDS'],
+                                    current_app.config['LIVE_STREAM_SECONDS'])
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Ask nginx not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+DAILY_SALES_DEFAULT_DAYS = 30
+DAILY_SALES_MAX_DAYS = 366
+
+@bp.route('/admin/daily-sales')
+@admin_required
+@replica.replica_reads
+@http_cache.conditional(reports_version)
+def daily_sales():
+    """Daily sales tracking and analytics"""
+    # Get date range from query parameters (default to last 30 days)
+    end_date = parse_date_arg('end_date') or local_today()
+    start_date = parse_date_arg('start_date')
+    if not start_date or start_date > end_date:
+        days = request.args.get('days', DAILY_SALES_DEFAULT_DAYS, type=int)
+        days = max(1, min(days, DAILY_SALES_MAX_DAYS))
+        start_date = end_date - timedelta(days=days - 1)
+    
+    # Sum and count every day of the range in a single grouped query
+    daily_data = reporting.daily_series(current_store().id, start_date, end_date)
+    
+    # Calculate summary statistics
+    total_sales = sum(day['total'] for day in daily_data)
+    avg_daily_sales = total_sales / len(daily_data) if daily_data else 0
+    best_day = max(daily_data, key=lambda x: x['total']) if daily_data else None
+    total_receipts = sum(day['receipts_count'] for day in daily_data)
+    
+    return render_template('daily_sales.html',
+                         daily_data=daily_data,
+                         total_sales=total_sales,
+                         avg_daily_sales=avg_daily_sales,
+                         best_day=best_day,
+                         total_receipts=total_receipts,
+                         start_date=start_date.strftime('%Y-%m-%d'),
+                         end_date=end_date.strftime('%Y-%m-%d'))
+
+@bp.route('/admin/print-daily-report')
+@admin_required
+@replica.replica_reads
+@http_cache.conditional(reports_version)
+def print_daily_report():
+    """Print a sales report for today, or for a start_date/end_date range"""
+    today = local_today()
+    start_date = parse_date_arg('start_date') or today
+    end_date = parse_date_arg('end_date') or start_date
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
+    
+    store_id = current_store().id
+    
+    # The range's receipts are read in batches with their items loaded per
+    # batch while the page streams, so a long range is never held in memory;
+    # the items are also summarized in SQL below
+    today_receipts = exports.iter_receipts(reporting.filtered_receipt_queries(store_id, start_date, end_date), PRINT_BATCH_SIZE)
+    
+    # Calculate totals from the daily rollup
+    buckets = reporting.sales_by_day(store_id, start_date, end_date)
+    total_sales = sum(bucket['total'] for bucket in buckets.values())
+    total_receipts_count = sum(bucket['receipts_count'] for bucket in buckets.values())
+    
+    # Quantity, revenue and unit prices per item, grouped by the database
+    items_list = reporting.item_sales(store_id, start_date, end_date)
+    
+    business_info = current_business_info()
+    
+    return stream_template('print_daily_report.html',
+                         today=start_date,
+                         start_date=start_date,
+                         end_date=end_date,
+                         today_receipts=today_receipts,
+                         total_sales=total_sales,
+                         total_receipts_count=total_receipts_count,
+                         items_summary=items_list,
+                         business_info=business_info)
+
+@bp.route('/admin/business', methods=['GET', 'POST'])
+@admin_required
+def admin_business():
+    """Manage business information"""
+    if request.method == 'POST':
+        # Get or create the store's business info
+        store_id = current_store().id
+        business_info = BusinessInfo.query.filter_by(store_id=store_id).first()
+        if not business_info:
+            business_info = BusinessInfo(store_id=store_id)
+            db.session.add(business_info)
+        
+        # Update fields
+        business_info.business_name = request.form.get('business_name', '')
+        business_info.contact_number = request.form.get('contact_number', '')
+        business_info.location = request.form.get('location', '')
+        business_info.business_email = request.form.get('business_email', '')
+        business_info.attendant = request.form.get('attendant', '')
+        
+        try:
+            db.session.commit()
+            business_info_cache.invalidate()
+            flash('Business information updated successfully!', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error updating business information: {str(e)}', 'error')
+        
+        return redirect(url_for('admin.admin_business'))
+    
+    business_info = current_business_info()
+    return render_template('admin_business.html', business_info=business_info)
+
+def job_date(params, name):
+    value = params.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def run_receipts_export(path, params, progress):
+    with replica.reporting():
+        queries = reporting.filtered_receipt_queries(
+            params['store_id'],
+            start_date=job_date(params, 'start_date'),
+            end_date=job_date(params, 'end_date'),
+            attendant=params.get('attendant'),
+            customer=params.get('customer')
+        )
+        exports.write_receipts_workbook(path, queries, progress)
+
+def run_sales_report(path, params, progress):
+    with replica.reporting():
+        exports.write_sales_report_workbook(path, params['store_id'], job_date(params, 'start_date'),
+                                            job_date(params, 'end_date'), progress)
+
+job_runner.register('receipts_excel', run_receipts_export, '.xlsx', exports.XLSX_MIMETYPE)
+job_runner.register('sales_report', run_sales_report, '.xlsx', exports.XLSX_MIMETYPE)
+
+def store_job_or_404(job_id):
+    """A job of the request's store; other stores' jobs are not found"""
+    job = db.get_or_404(Job, job_id)
+    if json.loads(job.params).get('store_id') != current_store().id:
+        abort(404)
+    return job
+
+def job_response(job, status_code=200):
+    data = job_runner.describe(job)
+    data['status_url'] = url_for('admin.job_status', job_id=job.id)
+    if job.status == 'done':
+        data['download_url'] = url_for('admin.job_download', job_id=job.id)
+    return jsonify(data), status_code
+
+@bp.route('/admin/jobs/<kind>', methods=['POST'])
+@admin_required
+def submit_job(kind):
+    """Start a background export or report; identical requests share one job"""
+    if kind not in job_runner.kinds:
+        return jsonify({'success': False, 'message': f'Unknown job type: {kind}'}), 404
+    
+    start_date = parse_date_arg('start_date')
+    end_date = parse_date_arg('end_date')
+    if kind == 'sales_report':
+        end_date = end_date or local_today()
+        start_date = start_date or end_date - timedelta(days=DAILY_SALES_DEFAULT_DAYS - 1)
+        if start_date > end_date:
+            return jsonify({'success': False, 'message': 'start_date must not be after end_date'}), 400
+    
+    params = {
+        'store_id': current_store().id,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+    }
+    if kind == 'receipts_excel':
+        params['attendant'] = request.args.get('attendant', '').strip() or None
+        params['customer'] = request.args.get('customer', '').strip() or None
+    
+    # A finished job is reused only while the store's receipts are unchanged
+    version = http_cache.data_version(params['store_id'])
+    job = job_runner.submit(kind, params, [version.newest_id, version.oldest_id, version.deletions])
+    return job_response(job, 202)
+
+@bp.route('/admin/jobs/<job_id>')
+@admin_required
+def job_status(job_id):
+    """Status and progress of a background job"""
+    return job_response(store_job_or_404(job_id))
+
+@bp.route('/admin/jobs/<job_id>/download')
+@admin_required
+def job_download(job_id):
+    """Download the result of a finished background job"""
+    job = store_job_or_404(job_id)
+    path = job_runner.artifact_path(job)
+    if job.status != 'done' or not path or not os.path.exists(path):
+        abort(404)
+    
+    params = json.loads(job.params)
+    range_part = exports.range_suffix(job_date(params, 'start_date'), job_date(params, 'end_date'))
+    prefix = 'receipts_report' if job.kind == 'receipts_excel' else job.kind
+    _, suffix, mimetype = job_runner.kinds[job.kind]
+    return send_file(path, as_attachment=True, mimetype=mimetype,
+                     download_name=f"{prefix}{range_part}_{to_local(job.finished_at).strftime('%Y%m%d_%H%M%S')}{suffix}")
+
+@bp.route('/admin/metrics')
+@admin_required
+def admin_metrics():
+    """Per-endpoint latency and SQL histograms in Prometheus text format"""
+    return Response(metrics.render() + request_logging.pipeline.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,113 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+
+from models import db, BusinessInfo
+import search
+import sync_export
+from auth import sync_auth_required
+from extensions import business_info_cache, current_business_info, current_store
+from localtime import to_local
+from receipt_views import MAX_RECEIPTS_PER_PAGE
+
+bp = Blueprint('api', __name__)
+
+@bp.route('/api/business_info', methods=['GET', 'POST'])
+def business_info_api():
+    """API for business information"""
+    if request.method == 'POST':
+        data = request.get_json()
+        
+        # Get or create the store's business info
+        store_id = current_store().id
+        business_info = BusinessInfo.query.filter_by(store_id=store_id).first()
+        if not business_info:
+            business_info = BusinessInfo(store_id=store_id)
+            db.session.add(business_info)
+        
+        # Update fields
+        business_info.business_name = data.get('business_name', '')
+        business_info.contact_number = data.get('contact_number', '')
+        business_info.location = data.get('location', '')
+        business_info.business_email = data.get('business_email', '')
+        business_info.attendant = data.get('attendant', '')
+        
+        try:
+            db.session.commit()
+            business_info_cache.invalidate()
+            return jsonify({'success': True, 'message': 'Business information saved successfully'})
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    else:  # GET
+        business_info = current_business_info()
+        if business_info:
+            return jsonify({
+                'business_name': business_info.business_name,
+                'contact_number': business_info.contact_number,
+                'location': business_info.location,
+                'business_email': business_info.business_email or '',
+                'attendant': business_info.attendant
+            })
+        return jsonify({})
+
+SEARCH_PER_PAGE = 20
+
+@bp.route('/api/search')
+def search_api():
+    """Ranked full-text search over receipt numbers, customers and line items"""
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', SEARCH_PER_PAGE, type=int), MAX_RECEIPTS_PER_PAGE))
+    
+    receipts, has_next = search.search_receipts(current_store().id, query, page, per_page)
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'has_next': has_next,
+        'results': [
+            {
+                'receipt_number': receipt.receipt_number,
+                'date': to_local(receipt.date_created).strftime('%Y-%m-%d %H:%M'),
+                'customer_name': receipt.customer_name,
+                'customer_address': receipt.customer_address,
+                'attendant': receipt.attendant,
+                'total': float(receipt.total_amount or 0),
+                'items': [item.description for item in receipt.items],
+                'url': url_for('receipts.view_receipt', receipt_number=receipt.receipt_number)
+            }
+            for receipt in receipts
+        ]
+    })
+
+@bp.route('/api/sync/receipts')
+@sync_auth_required
+def sync_receipts():
+    """Stream the store's receipts created and deleted since a cursor, as CSV or NDJSON"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': 'format must be csv or ndjson'}), 400
+    limit = request.args.get('limit', type=int)
+    store_id = current_store().id
+    try:
+        receipt_range, tombstone_range, next_cursor, has_more = sync_export.plan(
+            store_id, request.args.get('since', '').strip(), limit if limit and limit > 0 else None)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid since cursor'}), 400
+    
+    if fmt == 'csv':
+        lines, mimetype = sync_export.csv_lines(store_id, receipt_range, tombstone_range), 'text/csv'
+    else:
+        lines, mimetype = sync_export.ndjson_lines(store_id, receipt_range, tombstone_range), 'application/x-ndjson'
+    filename = f'receipts_sync_{next_cursor}.{fmt}'
+    if request.args.get('gzip', '').lower() in ('1', 'true', 'yes'):
+        body, mimetype, filename = sync_export.gzipped(lines), 'application/gzip', filename + '.gz'
+    else:
+        body = sync_export.encoded(lines)
+    
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    # Pass this back as ?since= on the next sync
+    response.headers['X-Sync-Cursor'] = next_cursor
+    response.headers['X-Sync-Has-More'] = 'true' if has_more else 'false'
+    return response
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from models import db, Receipt, ReceiptItem, ArchivedReceipt, ArchivedReceiptItem
+
+ARCHIVE_BATCH_SIZE = 500
+
+# (hot model, archive model) pairs, in the order rows must be inserted
+ARCHIVED_MODELS = ((Receipt, ArchivedReceipt), (ReceiptItem, ArchivedReceiptItem))
+
+
+def archive_receipts(older_than_days, batch_size=ARCHIVE_BATCH_SIZE, log=None):
+    """Move receipts created more than older_than_days ago into the archive tables.
+
+    Each batch is copied and deleted in its own transaction, so the hot
+    tables are never locked for long and an interrupted run can simply be
+    repeated. Returns the number of receipts moved.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+    while True:
+        ids = [row[0] for row in db.session.query(Receipt.id).filter(
+            Receipt.date_created < cutoff
+        ).order_by(Receipt.id).limit(batch_size)]
+        if not ids:
+            break
+        
+        for hot, cold in ARCHIVED_MODELS:
+            key = hot.id if hot is Receipt else hot.receipt_id
+            columns = [column.key for column in hot.__table__.columns]
+            db.session.execute(cold.__table__.insert().from_select(
+                columns,
+                select(*(hot.__table__.c[column] for column in columns)).where(key.in_(ids))
+            ))
+        ReceiptItem.query.filter(ReceiptItem.receipt_id.in_(ids)).delete(synchronize_session=False)
+        Receipt.query.filter(Receipt.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        
+        moved += len(ids)
+        if log:
+            log(f"  archived {moved} receipts")
+    return moved
+
+
+def archive_boundary(store_id=None):
+    """Creation time of the store's newest archived receipt (any store's if None), or None when nothing is archived"""
+    query = db.session.query(func.max(ArchivedReceipt.date_created))
+    if store_id is not None:
+        query = query.filter(ArchivedReceipt.store_id == store_id)
+    return query.scalar()
+
+
+def reaches_archive(store_id, start=None):
+    """Whether a range starting at the naive UTC datetime start (None: unbounded) includes archived receipts"""
+    boundary = archive_boundary(store_id)
+    return boundary is not None and (start is None or start <= boundary)
+
+
+def receipt_sources(store_id, start=None):
+    """(receipt model, item model) pairs to read for a store's range starting at start, newest data first"""
+    if reaches_archive(store_id, start):
+        return [(Receipt, ReceiptItem), (ArchivedReceipt, ArchivedReceiptItem)]
+    return [(Receipt, ReceiptItem)]
+
+
+def count_receipts(store_id):
+    """Number of a store's receipts, hot and archived"""
+    return sum(model.query.filter(model.store_id == store_id).count() for model in (Receipt, ArchivedReceipt))
+
+
+def find_receipt(store_id, receipt_number):
+    """Look a store's receipt up by number, with its items, in the hot table and then the archive"""
+    for model in (Receipt, ArchivedReceipt):
+        receipt = (model.query.options(selectinload(model.items))
+                   .filter_by(store_id=store_id, receipt_number=receipt_number).first())
+        if receipt is not None:
+            return receipt
+    return None
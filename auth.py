@@ -0,0 +1,30 @@
+import hmac
+from functools import wraps
+
+from flask import current_app, jsonify, redirect, request, session, url_for
+
+# Admin authentication credentials
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "dikosasabihin"
+
+# Authentication decorator
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get('admin_logged_in'):
+            return redirect(url_for('admin.admin_login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def sync_auth_required(f):
+    """Allow a logged-in admin, or a request carrying 'Authorization: Bearer <SYNC_API_TOKEN>'"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if session.get('admin_logged_in'):
+            return f(*args, **kwargs)
+        token = current_app.config.get('SYNC_API_TOKEN')
+        auth = request.headers.get('Authorization', '')
+        if token and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token):
+            return f(*args, **kwargs)
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    return decorated_function
@@ -0,0 +1,137 @@
+"""Bulk-create realistic receipt history for benchmarking.
+
+Receipts are spread over the last --days local days during business hours,
+each with one to four line items drawn from a typical print-and-repair
+catalog (added to the item catalog) or custom repairs. With --stores N the
+receipts are dealt round-robin to the default store and N-1 more branches.
+Rows are inserted with bulk INSERTs in batches, then the daily sales rollup
+and the search index are rebuilt so the dashboards and search match.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/generate_data.py --receipts 100000 --days 365
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+ATTENDANTS = ['Ana', 'Ben', 'Carla', 'Dino', 'Ella']
+CUSTOMERS = ['Walk-in', 'Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Villanueva']
+CATALOG = [
+    ('Printing B/W', 5, 50),
+    ('Printing Colored', 10, 30),
+    ('Photocopy', 3, 60),
+    ('Scanning', 10, 10),
+    ('Lamination', 20, 5),
+    ('Computer Repair', 500, 1),
+    ('Reformat / OS Install', 350, 1),
+    ('Virus Removal', 300, 1),
+]
+CUSTOM_ITEMS = ['Printer repair', 'Keyboard replacement', 'Data recovery', 'Ink refill']
+
+
+def random_items(rng):
+    items = []
+    for _ in range(rng.randint(1, 4)):
+        if rng.random() < 0.1:
+            description, price, max_qty, custom = rng.choice(CUSTOM_ITEMS), rng.choice([150, 250, 400, 800]), 1, True
+        else:
+            (description, price, max_qty), custom = rng.choice(CATALOG), False
+        quantity = rng.randint(1, max_qty)
+        items.append((description, custom, quantity, price, quantity * price))
+    return items
+
+
+def generate(receipts, days, seed=0, stores=1, batch_size=5000, log=print):
+    """Insert `receipts` receipts spread over the last `days` local days and `stores` stores; needs an app context"""
+    from flask import current_app
+    from localtime import local_day_start, local_today
+    from models import db, Receipt, ReceiptItem
+    import catalog
+    import reporting
+    import search
+    from stores import add_store
+    
+    rng = random.Random(seed)
+    store_ids = [add_store(current_app.config['DEFAULT_STORE'], 'Main store').id]
+    store_ids += [add_store(f'branch{number}', f'Branch {number}').id for number in range(2, stores + 1)]
+    db.session.commit()
+    catalog_ids = catalog.add_items({description: price for description, price, _ in CATALOG})
+    today = local_today()
+    # Only numbers the receipts; ids are left to the database, so its
+    # sequences stay in step for receipts created through the app later
+    serial = (db.session.query(db.func.max(Receipt.id)).scalar() or 0) + 1
+    insert_receipts = db.insert(Receipt).returning(Receipt.id, sort_by_parameter_order=True)
+    
+    started = time.perf_counter()
+    created = 0
+    while created < receipts:
+        receipt_rows, receipt_items = [], []
+        for _ in range(min(batch_size, receipts - created)):
+            day = today - timedelta(days=rng.randrange(days))
+            # Business hours, 8:00 to 20:00 local time
+            date_created = local_day_start(day) + timedelta(seconds=rng.randrange(8 * 3600, 20 * 3600))
+            items = random_items(rng)
+            total = sum(item[4] for item in items)
+            money_received = total + rng.choice([0, 0, 20, 50, 100])
+            receipt_rows.append({
+                'store_id': store_ids[serial % len(store_ids)],
+                'receipt_number': f"{day.strftime('%Y%m%d')}-S{serial:07d}",
+                'date_created': date_created,
+                'business_name': 'Benchmark Computer Services',
+                'business_email': 'shop@example.com',
+                'contact_number': '0917 000 0000',
+                'location': 'Manila',
+                'attendant': rng.choice(ATTENDANTS),
+                'customer_name': rng.choice(CUSTOMERS),
+                'customer_address': '',
+                'total_amount': total,
+                'money_received': money_received,
+                'change_amount': money_received - total,
+            })
+            receipt_items.append(items)
+            serial += 1
+        receipt_ids = db.session.execute(insert_receipts, receipt_rows).scalars().all()
+        item_rows = [{
+            'receipt_id': receipt_id,
+            'catalog_item_id': None if custom else catalog_ids[description],
+            'custom_description': description if custom else None,
+            'quantity': quantity,
+            'price': price,
+            'subtotal': subtotal,
+        } for receipt_id, items in zip(receipt_ids, receipt_items)
+            for description, custom, quantity, price, subtotal in items]
+        db.session.execute(ReceiptItem.__table__.insert(), item_rows)
+        db.session.commit()
+        created += len(receipt_rows)
+        log(f"  {created}/{receipts} receipts")
+    
+    reporting.rebuild_rollup()
+    search.rebuild_index()
+    db.session.commit()
+    log(f"Generated {receipts} receipts over {days} days in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--receipts', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365, help='spread receipts over this many past days')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stores', type=int, default=1, help='spread receipts over this many stores')
+    parser.add_argument('--database-url', help='defaults to DATABASE_URL')
+    args = parser.parse_args()
+    
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import app
+    from commands import create_schema
+    
+    with app.app_context():
+        create_schema()
+        generate(args.receipts, args.days, args.seed, args.stores)
+
+
+if __name__ == '__main__':
+    main()
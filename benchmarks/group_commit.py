@@ -0,0 +1,84 @@
+"""Compare per-request commits with group commit for receipt creation.
+
+Posts receipts to /generate_receipt from concurrent threads against a
+throw-away SQLite database and reports sustained receipts per second for
+each write mode.
+
+    python benchmarks/group_commit.py --threads 16 --receipts 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+RECEIPT_FORM = {
+    'business_name': 'Benchmark Shop',
+    'contact_number': '0917 000 0000',
+    'location': 'Manila',
+    'attendant': 'Bench',
+    'customer_name': 'Walk-in',
+    'item_description[]': ['Printing B/W', 'Photocopy'],
+    'custom_description[]': ['', ''],
+    'quantity[]': ['10', '5'],
+    'price[]': ['5', '3'],
+    'money_received': '100',
+}
+
+
+def run_mode(app, Receipt, group_commit, threads, receipts_per_thread):
+    app.config['RECEIPT_GROUP_COMMIT'] = group_commit
+    with app.app_context():
+        before = Receipt.query.count()
+    
+    def worker():
+        client = app.test_client()
+        for _ in range(receipts_per_thread):
+            client.post('/generate_receipt', data=RECEIPT_FORM)
+    
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    
+    with app.app_context():
+        saved = Receipt.query.count() - before
+    return {
+        'mode': 'group' if group_commit else 'per-request',
+        'attempted': threads * receipts_per_thread,
+        'saved': saved,
+        'seconds': round(elapsed, 3),
+        'receipts_per_second': round(saved / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--receipts', type=int, default=50, help='receipts per thread')
+    args = parser.parse_args()
+    
+    db_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(db_dir, 'bench.db')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    logging.disable(logging.CRITICAL)
+    from app import app
+    from commands import create_schema
+    from models import Receipt
+    
+    with app.app_context():
+        create_schema()
+    
+    for group_commit in (False, True):
+        result = run_mode(app, Receipt, group_commit, args.threads, args.receipts)
+        print('{mode:>12}: {saved}/{attempted} saved in {seconds}s '
+              '({receipts_per_second} receipts/s)'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
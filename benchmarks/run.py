@@ -0,0 +1,205 @@
+"""Per-route latency, memory and SQL benchmark.
+
+Runs each route several times through the Flask test client, in its own
+forked process so peak RSS is attributable to that route, and records
+p50/p95 latency, peak RSS and SQL statements per request. Results are
+written as JSON; pass --compare with an earlier result to see the change.
+
+    python benchmarks/run.py --database-url sqlite:////tmp/bench.db --generate 100000 --output sqlite-100k.json
+    python benchmarks/run.py --database-url postgresql://localhost/receipts_bench --output pg.json --compare sqlite-100k.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+
+ROUTES = [
+    ('receipts_list', 'GET', '/receipts'),
+    ('export_excel', 'GET', '/export_excel'),
+    ('admin_panel', 'GET', '/admin'),
+    ('daily_sales', 'GET', '/admin/daily-sales'),
+    ('print_daily_report', 'GET', '/admin/print-daily-report'),
+    ('generate_receipt', 'POST', '/generate_receipt'),
+]
+
+RECEIPT_FORM = {
+    'business_name': 'Benchmark Computer Services',
+    'contact_number': '0917 000 0000',
+    'location': 'Manila',
+    'attendant': 'Bench',
+    'customer_name': 'Walk-in',
+    'item_description[]': ['Printing B/W', 'custom'],
+    'custom_description[]': ['', 'Printer repair'],
+    'quantity[]': ['10', '1'],
+    'price[]': ['5', '250'],
+    'money_received': '500',
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def bench_route(name, method, path, iterations, warmup):
+    from sqlalchemy import event
+    from app import app
+    from models import db
+    
+    with app.app_context():
+        # Do not share pooled connections with the parent process
+        db.engine.dispose(close=False)
+        engine = db.engine
+    
+    statements = [0]
+    
+    def count_statement(*args):
+        statements[0] += 1
+    
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    
+    def request_once():
+        if method == 'POST':
+            response = client.post(path, data=RECEIPT_FORM)
+        else:
+            response = client.get(path)
+        # Drain streamed responses so their cost is counted
+        for _ in response.response:
+            pass
+        response.close()
+        return response.status_code
+    
+    for _ in range(warmup):
+        request_once()
+    
+    timings, queries, statuses = [], [], {}
+    for _ in range(iterations):
+        statements[0] = 0
+        started = time.perf_counter()
+        status = request_once()
+        timings.append((time.perf_counter() - started) * 1000)
+        queries.append(statements[0])
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    
+    return {
+        'route': name,
+        'method': method,
+        'path': path,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+        'queries_per_request': round(statistics.fmean(queries), 1),
+        'peak_rss_kb': peak_rss_kb(),
+        'statuses': statuses,
+    }
+
+
+def _bench_in_child(queue, *args):
+    try:
+        queue.put(bench_route(*args))
+    except Exception as e:
+        queue.put({'route': args[0], 'error': repr(e)})
+
+
+def run_isolated(*args):
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_bench_in_child, args=(queue,) + args)
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {r['route']: r for r in json.load(f)['routes']}
+    print(f"\nChange against {baseline_path}:")
+    for result in results:
+        before = baseline.get(result['route'])
+        if not before or 'error' in result or 'error' in before:
+            continue
+        print('  {:<20} p95 {:>9.2f} -> {:>9.2f} ms ({:+.0%})  queries {:>6} -> {:>6}'.format(
+            result['route'], before['p95_ms'], result['p95_ms'],
+            result['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0,
+            before['queries_per_request'], result['queries_per_request']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='defaults to DATABASE_URL')
+    parser.add_argument('--generate', type=int, default=0, metavar='N', help='first add N synthetic receipts')
+    parser.add_argument('--days', type=int, default=365, help='date spread of generated receipts')
+    parser.add_argument('--stores', type=int, default=1,
+                        help='spread generated receipts over this many stores; routes run as the default store')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--routes', nargs='*', help='only run these routes')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+    
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    logging.disable(logging.CRITICAL)
+    from app import app
+    from commands import create_schema
+    from models import db, Receipt, Store
+    from generate_data import generate
+    
+    with app.app_context():
+        create_schema()
+        if args.generate:
+            generate(args.generate, args.days, stores=args.stores, log=lambda message: None)
+        receipts = Receipt.query.count()
+        stores = Store.query.count()
+        dialect = db.engine.dialect.name
+        db.engine.dispose()
+    
+    results = []
+    for name, method, path in ROUTES:
+        if args.routes and name not in args.routes:
+            continue
+        result = run_isolated(name, method, path, args.iterations, args.warmup)
+        results.append(result)
+        if 'error' in result:
+            print(f"{name:<20} failed: {result['error']}")
+        else:
+            print('{route:<20} p50 {p50_ms:>9.2f} ms  p95 {p95_ms:>9.2f} ms  '
+                  'queries {queries_per_request:>6}  peak RSS {peak_rss_kb:>8} KB  {statuses}'.format(**result))
+    
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'database': dialect,
+        'receipts': receipts,
+        'stores': stores,
+        'python': platform.python_version(),
+        'routes': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
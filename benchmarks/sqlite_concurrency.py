@@ -0,0 +1,138 @@
+"""Concurrent reads and writes on SQLite, default settings vs the production profile.
+
+Seeds a throw-away SQLite database, then runs reader threads that stream
+every receipt the way exports and print-all do while writer threads post
+receipts to /generate_receipt. Each profile runs in its own process, since
+SQLITE_PROFILE is read at import time. Reports write throughput and
+latency, failed writes and full scans per second.
+
+    python benchmarks/sqlite_concurrency.py --receipts 20000 --readers 4 --writers 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = ('default', 'production')
+
+RECEIPT_FORM = {
+    'business_name': 'Benchmark Shop',
+    'contact_number': '0917 000 0000',
+    'location': 'Manila',
+    'attendant': 'Bench',
+    'customer_name': 'Walk-in',
+    'item_description[]': ['Printing B/W', 'Photocopy'],
+    'custom_description[]': ['', ''],
+    'quantity[]': ['10', '5'],
+    'price[]': ['5', '3'],
+    'money_received': '100',
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def run_profile(args):
+    """Child process: seed the database and run readers and writers against it"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    logging.disable(logging.CRITICAL)
+    from app import app
+    from commands import create_schema
+    from models import db, Receipt
+    import exports
+    from generate_data import generate
+    
+    with app.app_context():
+        create_schema()
+        generate(args.receipts, 30, log=lambda message: None)
+        before = Receipt.query.count()
+    
+    done = threading.Event()
+    write_latencies, scans = [], []
+    lock = threading.Lock()
+    
+    def reader():
+        with app.app_context():
+            while not done.is_set():
+                for _ in exports.iter_receipts([Receipt.query]):
+                    if done.is_set():
+                        break
+                else:
+                    with lock:
+                        scans.append(1)
+                db.session.remove()
+    
+    def writer():
+        client = app.test_client()
+        for _ in range(args.writes):
+            started = time.perf_counter()
+            client.post('/generate_receipt', data=RECEIPT_FORM)
+            with lock:
+                write_latencies.append(time.perf_counter() - started)
+    
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    writers = [threading.Thread(target=writer) for _ in range(args.writers)]
+    started = time.perf_counter()
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for t in readers:
+        t.join()
+    
+    with app.app_context():
+        saved = Receipt.query.count() - before
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+    print(json.dumps({
+        'profile': os.environ['SQLITE_PROFILE'],
+        'journal_mode': journal_mode,
+        'attempted': args.writers * args.writes,
+        'saved': saved,
+        'failed': args.writers * args.writes - saved,
+        'writes_per_second': round(saved / elapsed, 1) if elapsed else 0.0,
+        'write_p50_ms': round(percentile(write_latencies, 50) * 1000, 1),
+        'write_p95_ms': round(percentile(write_latencies, 95) * 1000, 1),
+        'scans_per_second': round(len(scans) / elapsed, 2) if elapsed else 0.0,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--receipts', type=int, default=20000, help='receipts to seed before the run')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=25, help='receipts per writer')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_profile(args)
+        return
+    
+    for profile in PROFILES:
+        db_dir = tempfile.mkdtemp()
+        env = dict(os.environ,
+                   SQLITE_PROFILE=profile,
+                   DATABASE_URL='sqlite:///' + os.path.join(db_dir, 'bench.db'),
+                   RECEIPT_HTML_CACHE_DIR=os.path.join(db_dir, 'html'))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'] + sys.argv[1:],
+                                env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print('{profile:>10} ({journal_mode}): {saved}/{attempted} saved, {failed} failed, '
+              '{writes_per_second} writes/s, p50 {write_p50_ms}ms, p95 {write_p95_ms}ms, '
+              '{scans_per_second} full scans/s'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
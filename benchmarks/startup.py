@@ -0,0 +1,101 @@
+"""Cold-start benchmark: how long a fresh worker process takes to serve its first request.
+
+Each run starts a new Python process that imports the app (as gunicorn does
+with main:app) and sends one request through the test client. Reports the
+median and best import time, first-request time and whole-process time,
+and whether the export stack (openpyxl) and Alembic were loaded. Pass
+--ref to measure an older commit the same way for comparison.
+
+    python benchmarks/startup.py --runs 15
+    python benchmarks/startup.py --runs 15 --ref HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PREPARE = """
+from app import app
+try:
+    from commands import create_schema
+except ImportError:
+    # Older trees create the schema when app is imported
+    create_schema = None
+if create_schema:
+    with app.app_context():
+        create_schema()
+"""
+
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+status = app.test_client().get('/api/business_info').status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'status': status,
+    'openpyxl': 'openpyxl' in sys.modules,
+    'alembic': 'alembic' in sys.modules,
+}))
+"""
+
+
+def export_tree(ref):
+    """Check out ref into a temporary directory and return its path"""
+    directory = tempfile.mkdtemp()
+    archive = subprocess.run(['git', 'archive', ref], cwd=ROOT, check=True, capture_output=True).stdout
+    subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+    return directory
+
+
+def measure(tree, runs):
+    db_dir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(db_dir, 'startup.db'))
+    subprocess.run([sys.executable, '-c', PREPARE], cwd=tree, env=env, check=True, capture_output=True)
+    
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', MEASURE], cwd=tree, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result['process_ms'] = (time.perf_counter() - started) * 1000
+        results.append(result)
+    
+    summary = {'status': results[-1]['status'], 'openpyxl': results[-1]['openpyxl'], 'alembic': results[-1]['alembic']}
+    for key in ('import_ms', 'first_request_ms', 'process_ms'):
+        values = [result[key] for result in results]
+        summary[key] = {'median': round(statistics.median(values), 1), 'min': round(min(values), 1)}
+    return summary
+
+
+def report(label, summary):
+    print(f"{label}:")
+    for key in ('import_ms', 'first_request_ms', 'process_ms'):
+        print(f"  {key:>17}: median {summary[key]['median']:7.1f}  min {summary[key]['min']:7.1f}")
+    print(f"  first response {summary['status']}, openpyxl loaded: {summary['openpyxl']}, "
+          f"alembic loaded: {summary['alembic']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--ref', help='also measure this git revision, e.g. HEAD~1')
+    args = parser.parse_args()
+    
+    if args.ref:
+        report(args.ref, measure(export_tree(args.ref), args.runs))
+    report('working tree', measure(ROOT, args.runs))
+
+
+if __name__ == '__main__':
+    main()
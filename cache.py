@@ -0,0 +1,167 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+_snapshot_types = {}
+
+
+def freeze(obj):
+    """Copy a model instance's column values into an immutable, session-free tuple"""
+    if obj is None:
+        return None
+    model = type(obj)
+    columns = [column.key for column in model.__table__.columns]
+    snapshot_type = _snapshot_types.get(model)
+    if snapshot_type is None:
+        snapshot_type = _snapshot_types[model] = namedtuple(f'{model.__name__}Snapshot', columns)
+    return snapshot_type(*(getattr(obj, column) for column in columns))
+
+
+class VersionStamp:
+    """A version marker shared by every worker process on the host through a small file.
+
+    Reading the version is a single stat() call; bump() atomically replaces
+    the file so all workers see a new (inode, mtime, size) triple.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def current(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def bump(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}'
+        with open(tmp_path, 'w') as f:
+            f.write(str(time.time_ns()))
+        os.replace(tmp_path, self.path)
+
+
+class VersionedCache:
+    """Per-process cache of a rarely changing value, reloaded when its stamp changes.
+
+    max_age bounds how long a value is trusted without reloading, so hosts
+    that do not share the stamp file still converge.
+    """
+    
+    def __init__(self, stamp, loader, max_age=60):
+        self.stamp = stamp
+        self.loader = loader
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = None
+        self._value = None
+    
+    def get(self):
+        version = self.stamp.current()
+        now = time.monotonic()
+        if (self._loaded_at is not None and version == self._version
+                and now - self._loaded_at < self.max_age):
+            return self._value
+        with self._lock:
+            if (self._loaded_at is None or version != self._version
+                    or now - self._loaded_at >= self.max_age):
+                # Read the stamp before loading, so a write that lands while
+                # loading leaves a newer stamp behind and forces a reload
+                self._value = self.loader()
+                self._version = version
+                self._loaded_at = now
+            return self._value
+    
+    def invalidate(self):
+        """Call after the underlying data has been committed"""
+        self.stamp.bump()
+        with self._lock:
+            self._loaded_at = None
+
+
+class RenderedCache:
+    """Bounded LRU cache of rendered pages, optionally backed by a directory on disk.
+
+    Entries are evicted least-recently-used first once max_entries is reached.
+    When a stamp is given, a change of stamp (bumped by evict() in any worker)
+    clears this worker's in-memory entries; files on disk are shared and are
+    removed directly.
+    """
+    
+    def __init__(self, max_entries=512, directory=None, stamp=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.configure(max_entries, directory, stamp)
+    
+    def configure(self, max_entries=512, directory=None, stamp=None):
+        """Set the size, disk directory and stamp, dropping any pages held in memory"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.directory = directory
+            self.stamp = stamp
+            self._entries.clear()
+            self._version = stamp.current() if stamp else None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key):
+        # Keys come from URLs; hash them rather than trusting them as file names
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.html')
+    
+    def _check_stamp(self):
+        if self.stamp is None:
+            return
+        version = self.stamp.current()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+    
+    def get(self, key):
+        with self._lock:
+            self._check_stamp()
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if self.directory:
+            try:
+                with open(self._path(key), encoding='utf-8') as f:
+                    value = f.read()
+            except FileNotFoundError:
+                return None
+            self._remember(key, value)
+        return value
+    
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            path = self._path(key)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+    
+    def _remember(self, key, value):
+        with self._lock:
+            self._check_stamp()
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def evict(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        if self.stamp:
+            self.stamp.bump()
+            with self._lock:
+                self._version = self.stamp.current()
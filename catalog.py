@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from cache import freeze
+from models import db, CatalogItem, upsert_insert
+from sqlite_profile import retry_on_lock
+
+
+def load_catalog():
+    """Every catalog item as an immutable snapshot, keyed by name"""
+    return {item.name: freeze(item) for item in CatalogItem.query.order_by(CatalogItem.name)}
+
+
+def add_items(default_prices):
+    """Make sure every name in {name: default_price} is in the catalog; returns {name: id}.
+    
+    Runs in its own short transaction, like receipt number reservation, so
+    the new rows are visible to other workers at once and two workers adding
+    the same item end up sharing one row.
+    """
+    return retry_on_lock(lambda: _add_items_once(default_prices))
+
+
+def _add_items_once(default_prices):
+    table = CatalogItem.__table__
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        existing = dict(conn.execute(select(table.c.name, table.c.id).where(table.c.name.in_(list(default_prices)))).all())
+        for name, price in default_prices.items():
+            if name in existing:
+                continue
+            values = {'name': name, 'default_price': price, 'created_at': datetime.utcnow()}
+            if dialect in ('sqlite', 'postgresql'):
+                insert = upsert_insert(dialect)
+                conn.execute(insert(table).values(**values).on_conflict_do_nothing(index_elements=['name']))
+            else:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(table.insert().values(**values))
+                except IntegrityError:
+                    # Another worker added it first
+                    pass
+        return dict(conn.execute(select(table.c.name, table.c.id).where(table.c.name.in_(list(default_prices)))).all())
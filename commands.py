@@ -0,0 +1,109 @@
+import os
+
+import click
+from flask import Blueprint, current_app
+from sqlalchemy import inspect
+
+from models import db
+import archive
+import replica
+import reporting
+import search
+import stores
+from extensions import job_runner, store_cache
+
+BASELINE_REVISION = '4f2a9c1d7e30'
+
+# Commands are registered at the top level: `flask rebuild-rollup`, not `flask commands rebuild-rollup`
+bp = Blueprint('commands', __name__, cli_group=None)
+
+def create_schema():
+    """Create all tables, the search index and the DEFAULT_STORE store; safe to repeat"""
+    # Only on the primary: a reporting replica gets its tables from the primary
+    db.create_all(bind_key=None)
+    search.create_index()
+    stores.add_store(current_app.config['DEFAULT_STORE'], 'Main store')
+    db.session.commit()
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create the schema of a new, empty database and mark it as fully migrated"""
+    tables = inspect(db.engine).get_table_names()
+    if 'alembic_version' in tables:
+        raise click.ClickException("This database is already migrated; run `flask db upgrade` to update it")
+    if 'receipt' in tables:
+        raise click.ClickException("This database predates migrations; run "
+                                   f"`flask db stamp {BASELINE_REVISION}` and then `flask db upgrade`")
+    create_schema()
+    # Imported here: only the `flask` command loads Alembic (see create_app)
+    from flask_migrate import stamp
+    stamp()
+    click.echo("Database initialized")
+
+@bp.cli.command('setup-db')
+def setup_db_command():
+    """Bring any database up to date: create a new one, adopt one that predates migrations, or upgrade it"""
+    from flask_migrate import stamp, upgrade
+    tables = inspect(db.engine).get_table_names()
+    if 'alembic_version' not in tables:
+        if 'receipt' not in tables:
+            create_schema()
+            stamp()
+            click.echo("Database initialized")
+            return
+        # The tables match the baseline revision; later revisions still apply
+        click.echo(f"Database predates migrations; marking it as revision {BASELINE_REVISION}")
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+    click.echo("Database is up to date")
+
+@bp.cli.command('rebuild-rollup')
+@click.option('--start-date', type=click.DateTime(formats=['%Y-%m-%d']), help='First day to rebuild (default: all history)')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), help='Last day to rebuild (default: all history)')
+def rebuild_rollup_command(start_date, end_date):
+    """Recompute the daily sales rollup from the receipt table to repair drift"""
+    rows = reporting.rebuild_rollup(start_date.date() if start_date else None,
+                                    end_date.date() if end_date else None)
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} daily sales rollup rows")
+
+@bp.cli.command('cleanup-jobs')
+def cleanup_jobs_command():
+    """Delete expired background job results"""
+    click.echo(f"Removed {job_runner.cleanup()} expired jobs")
+
+@bp.cli.command('archive-receipts')
+@click.option('--older-than-days', type=int, default=lambda: int(os.environ.get('ARCHIVE_AFTER_DAYS', 365)),
+              show_default='ARCHIVE_AFTER_DAYS or 365', help='Archive receipts created more than this many days ago')
+def archive_receipts_command(older_than_days):
+    """Move old receipts from the hot tables into the archive tables"""
+    moved = archive.archive_receipts(older_than_days, log=click.echo)
+    click.echo(f"Archived {moved} receipts older than {older_than_days} days")
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index all receipts for full-text search"""
+    count = search.rebuild_index()
+    db.session.commit()
+    click.echo(f"Indexed {count} receipts")
+
+@bp.cli.command('create-store')
+@click.argument('code')
+@click.argument('name')
+def create_store_command(code, name):
+    """Add a store (branch); point a host at it with STORE_HOSTS"""
+    store = stores.add_store(code, name)
+    db.session.commit()
+    store_cache.invalidate()
+    click.echo(f"Store {store.code} (id {store.id}): {store.name}")
+
+@bp.cli.command('refresh-replica')
+def refresh_replica_command():
+    """Copy the primary SQLite database over the REPORTING_DATABASE_URL one (for local testing)"""
+    engines = db.engines
+    if replica.REPORTING_BIND not in engines:
+        raise click.ClickException("REPORTING_DATABASE_URL is not set")
+    if engines[None].dialect.name != 'sqlite' or engines[replica.REPORTING_BIND].dialect.name != 'sqlite':
+        raise click.ClickException("Only SQLite databases can be copied; use the database's own replication")
+    replica.copy_sqlite(engines[None], engines[replica.REPORTING_BIND])
+    click.echo(f"Copied {engines[None].url.database} to {engines[replica.REPORTING_BIND].url.database}")
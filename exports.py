@@ -0,0 +1,148 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+
+from localtime import to_local, local_now
+import reporting
+
+EXPORT_BATCH_SIZE = 500
+PROGRESS_EVERY = 500
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+@lru_cache(maxsize=None)
+def _xlsx():
+    """openpyxl and the cell styles, loaded on first use.
+    
+    Importing openpyxl costs ~60-90ms and only the export routes and jobs
+    need it, so worker startup skips it and the first export pays instead.
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, Border, Side
+    return SimpleNamespace(
+        Workbook=openpyxl.Workbook,
+        WriteOnlyCell=WriteOnlyCell,
+        get_column_letter=openpyxl.utils.get_column_letter,
+        header_font=Font(bold=True, size=12),
+        header_alignment=Alignment(horizontal='center', vertical='center'),
+        border=Border(left=Side(style='thin'), right=Side(style='thin'),
+                      top=Side(style='thin'), bottom=Side(style='thin'))
+    )
+
+
+def _styled_cell(ws, value, font=None, alignment=None):
+    xlsx = _xlsx()
+    cell = xlsx.WriteOnlyCell(ws, value=value)
+    cell.border = xlsx.border
+    if font:
+        cell.font = font
+    if alignment:
+        cell.alignment = alignment
+    return cell
+
+
+def _new_sheet(wb, title, headers, width=20):
+    xlsx = _xlsx()
+    ws = wb.create_sheet(title=title)
+    # Column widths must be set before any row is written
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[xlsx.get_column_letter(col)].width = width
+    ws.append([_styled_cell(ws, header, xlsx.header_font, xlsx.header_alignment) for header in headers])
+    return ws
+
+
+def range_suffix(start_date, end_date):
+    """File name fragment describing a date range, empty when unbounded"""
+    if not start_date and not end_date:
+        return ''
+    return '_{}_to_{}'.format(
+        start_date.strftime('%Y%m%d') if start_date else 'start',
+        end_date.strftime('%Y%m%d') if end_date else 'now')
+
+
+def receipts_filename(start_date=None, end_date=None):
+    return f"receipts_report{range_suffix(start_date, end_date)}_{local_now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+
+def iter_receipts(queries, batch_size=EXPORT_BATCH_SIZE):
+    """Newest-first receipts of each query in turn, read in batches with their items.
+    
+    Queries are given newest data first (hot table, then archive), so the
+    concatenation stays in date order. Each batch is its own query that
+    seeks past the last receipt of the previous one, so no read cursor stays
+    open between batches: on SQLite an open cursor holds a shared lock that
+    blocks every writer, including the job's own progress updates.
+    """
+    for query in queries:
+        model = query.column_descriptions[0]['entity']
+        query = (query.options(selectinload(model.items))
+                 .order_by(model.date_created.desc(), model.id.desc()))
+        batch = query.limit(batch_size).all()
+        while batch:
+            yield from batch
+            if len(batch) < batch_size:
+                break
+            last = batch[-1]
+            batch = query.filter(or_(
+                model.date_created < last.date_created,
+                and_(model.date_created == last.date_created, model.id < last.id)
+            )).limit(batch_size).all()
+
+
+def write_receipts_workbook(path, queries, progress=None):
+    """Write the receipts of one or more queries to an .xlsx file in constant memory.
+    
+    Receipts are read in fixed-size batches with the items of each batch
+    loaded in one extra query, and openpyxl's write-only mode streams rows
+    to disk. progress(done, total) is called every few hundred rows.
+    """
+    total = sum(query.order_by(None).count() for query in queries) if progress else None
+    receipts = iter_receipts(queries)
+    
+    wb = _xlsx().Workbook(write_only=True)
+    ws = _new_sheet(wb, "Receipts Report",
+                    ['Receipt #', 'Date', 'Business Name', 'Customer', 'Attendant', 
+                     'Items', 'Total Amount', 'Total in Words'])
+    
+    # Data rows
+    for done, receipt in enumerate(receipts, 1):
+        items_summary = '; '.join([f"{item.description} ({item.quantity}x)" for item in receipt.items])
+        ws.append([
+            _styled_cell(ws, receipt.receipt_number),
+            _styled_cell(ws, to_local(receipt.date_created).strftime('%Y-%m-%d %H:%M')),
+            _styled_cell(ws, receipt.business_name),
+            _styled_cell(ws, receipt.customer_name or 'Walk-in'),
+            _styled_cell(ws, receipt.attendant),
+            _styled_cell(ws, items_summary),
+            _styled_cell(ws, float(receipt.total_amount)),
+        ])
+        if progress and done % PROGRESS_EVERY == 0:
+            progress(done, total)
+    
+    wb.save(path)
+
+
+def write_sales_report_workbook(path, store_id, start_date, end_date, progress=None):
+    """Write a store's daily totals and per-item sales for a local date range to an .xlsx file"""
+    wb = _xlsx().Workbook(write_only=True)
+    
+    ws = _new_sheet(wb, "Daily Sales", ['Date', 'Day', 'Receipts', 'Total Sales'])
+    for day in reporting.daily_series(store_id, start_date, end_date):
+        ws.append([_styled_cell(ws, day['date']), _styled_cell(ws, day['day_name']),
+                   _styled_cell(ws, day['receipts_count']), _styled_cell(ws, day['total'])])
+    if progress:
+        progress(1, 2)
+    
+    ws = _new_sheet(wb, "Items", ['Item', 'Quantity', 'Revenue', 'Min Price', 'Max Price',
+                                  'Avg Price', 'Receipts'])
+    for item in reporting.item_sales(store_id, start_date, end_date):
+        ws.append([_styled_cell(ws, item['description']), _styled_cell(ws, item['quantity']),
+                   _styled_cell(ws, item['total_amount']), _styled_cell(ws, item['min_price']),
+                   _styled_cell(ws, item['max_price']), _styled_cell(ws, round(item['avg_price'], 2)),
+                   _styled_cell(ws, item['receipts_count'])])
+    
+    wb.save(path)
@@ -0,0 +1,85 @@
+import os
+
+from flask import current_app, g, request, session
+
+import catalog
+import live_updates
+import replica
+import stores
+from cache import RenderedCache, VersionStamp, VersionedCache, freeze
+from group_commit import GroupCommitWriter
+from jobs import JobRunner
+from models import BusinessInfo
+
+# Per-process services shared by the blueprints. They are created unbound,
+# like db, and attached to the app by init_app() in create_app()
+
+
+def load_business_info():
+    """Read every store's business information as immutable snapshots, keyed by store id"""
+    return {info.store_id: freeze(info) for info in BusinessInfo.query}
+
+# The business information changes rarely but is read on almost every page;
+# serve it from memory and reload only when a write bumps the version stamp.
+# Loaders always read the primary, so a lagging replica is never cached
+business_info_cache = VersionedCache(None, replica.on_primary(load_business_info))
+
+# Stores by code; read on every request to find the request's store
+store_cache = VersionedCache(None, replica.on_primary(stores.load_stores))
+
+# The item catalog behind the receipt form; new items bump the stamp
+catalog_cache = VersionedCache(None, replica.on_primary(catalog.load_catalog))
+
+# Rendered receipt pages, keyed by receipt number. Deleting a receipt bumps the
+# stamp so other workers drop their in-memory copies too
+receipt_html_cache = RenderedCache()
+
+# Optional write-behind mode: batch receipt inserts from concurrent requests
+# into shared transactions (see group_commit.py)
+group_writer = GroupCommitWriter()
+
+# Large exports and reports run on a small thread pool; results are kept in
+# the artifacts directory for JOB_TTL_SECONDS
+job_runner = JobRunner()
+
+# Receipt changes pushed to open dashboards over Server-Sent Events
+live_broker = live_updates.LiveBroker()
+
+
+def init_app(app):
+    """Bind the shared services to app; version stamps live in its instance folder"""
+    business_info_cache.stamp = VersionStamp(os.path.join(app.instance_path, 'business_info.version'))
+    store_cache.stamp = VersionStamp(os.path.join(app.instance_path, 'stores.version'))
+    catalog_cache.stamp = VersionStamp(os.path.join(app.instance_path, 'catalog.version'))
+    receipt_html_cache.configure(
+        max_entries=app.config['RECEIPT_HTML_CACHE_SIZE'],
+        directory=app.config['RECEIPT_HTML_CACHE_DIR'],
+        stamp=VersionStamp(os.path.join(app.instance_path, 'receipt_deletions.version'))
+    )
+    group_writer.init_app(app)
+    job_runner.init_app(app)
+    live_broker.init_app(app)
+
+
+def current_store():
+    """The store this request works for.
+    
+    The host name decides when it is listed in STORE_HOSTS, so each branch
+    can have its own address; otherwise it is the store an admin picked for
+    the session, or DEFAULT_STORE.
+    """
+    store = g.get('store')
+    if store is None:
+        by_code = store_cache.get()
+        code = current_app.config['STORE_HOSTS'].get(request.host.partition(':')[0].lower())
+        store = by_code.get(code or session.get('store_code')) or by_code.get(current_app.config['DEFAULT_STORE'])
+        if store is None:
+            raise RuntimeError(f"Store {current_app.config['DEFAULT_STORE']!r} does not exist; "
+                               "run `flask --app app init-db` or `flask create-store`")
+        g.store = store
+    return store
+
+
+def current_business_info():
+    """The business information of the request's store, or None if it was never set up"""
+    return business_info_cache.get().get(current_store().id)
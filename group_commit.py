@@ -0,0 +1,135 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from models import db
+from sqlite_profile import retry_on_lock
+import reporting
+import search
+
+
+class GroupCommitWriter:
+    """Write-behind queue that commits receipts from many requests in one transaction.
+
+    Request threads hand their receipt to submit() and block until the batch
+    containing it is committed. A single writer thread collects receipts for
+    up to max_delay seconds or max_batch receipts, whichever comes first, and
+    writes them together, so a burst of checkouts costs one commit (and on
+    SQLite one fsync and one write lock) instead of one per receipt.
+    """
+    
+    def __init__(self, app=None, max_batch=64, max_delay=0.005, timeout=30):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+    
+    def init_app(self, app):
+        """Write for app, configured by RECEIPT_GROUP_COMMIT_MAX_BATCH and _MAX_DELAY_MS"""
+        self.app = app
+        self.max_batch = app.config.get('RECEIPT_GROUP_COMMIT_MAX_BATCH', self.max_batch)
+        self.max_delay = app.config.get('RECEIPT_GROUP_COMMIT_MAX_DELAY_MS', self.max_delay * 1000) / 1000
+    
+    def submit(self, receipt):
+        """Queue a receipt and wait until it is durable; raises if writing it failed.
+
+        The receipt comes back detached from any session with its id,
+        date_created and items loaded.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((receipt, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Withdraw a receipt that is still queued so the writer skips it;
+            # one the writer already took may yet commit, so wait for that
+            if future.cancel():
+                raise
+            return future.result()
+    
+    def _ensure_started(self):
+        with self._lock:
+            # Threads do not survive a fork, so each worker starts its own writer
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='receipt-group-commit', daemon=True)
+                self._thread.start()
+    
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        with self.app.app_context():
+            # Receipts are read by the request threads after the commit, so
+            # keep their loaded state instead of expiring it
+            db.session().expire_on_commit = False
+            while True:
+                # Receipts whose request stopped waiting are not written
+                batch = [entry for entry in self._next_batch() if entry[1].set_running_or_notify_cancel()]
+                if not batch:
+                    continue
+                try:
+                    self._commit(batch)
+                except Exception as e:
+                    if len(batch) == 1:
+                        self._fail(batch[0], e)
+                        continue
+                    # One bad receipt must not fail the others, so write each on its own
+                    self.app.logger.warning("Group commit of %d receipts failed, retrying them one by one: %s", len(batch), e)
+                    for entry in batch:
+                        try:
+                            self._commit([entry])
+                        except Exception as e:
+                            self._fail(entry, e)
+    
+    def _commit(self, batch):
+        """Write batch in one transaction and resolve its futures; rolled back if it raises"""
+        try:
+            retry_on_lock(lambda: self._write(batch), lambda: self._rollback(batch))
+        except Exception:
+            self._rollback(batch)
+            raise
+        finally:
+            db.session.expunge_all()
+        for receipt, future in batch:
+            future.set_result(receipt)
+    
+    def _fail(self, entry, error):
+        receipt, future = entry
+        self.app.logger.error("Writing receipt %s failed: %s", receipt.receipt_number, error)
+        future.set_exception(error)
+    
+    def _rollback(self, batch):
+        db.session.rollback()
+        for receipt, _ in batch:
+            receipt.clear_ids()
+    
+    def _write(self, batch):
+        for receipt, _ in batch:
+            db.session.add(receipt)
+        db.session.flush()
+        for receipt, _ in batch:
+            reporting.record_receipt(receipt)
+            search.index_receipt(receipt)
+            # Request threads read item descriptions after the receipt is
+            # detached, so load catalog names while it is in this session
+            for item in receipt.items:
+                item.catalog_item
+        db.session.commit()
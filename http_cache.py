@@ -0,0 +1,101 @@
+import hashlib
+from collections import namedtuple
+from functools import wraps
+
+import pytz
+from flask import current_app, make_response, request, session
+from sqlalchemy import func, select
+from werkzeug.http import is_resource_modified
+
+from models import db, Receipt, ReceiptTombstone
+
+# Lists and reports may change with any receipt: browsers keep them but ask
+# again every time, which costs one version query when nothing changed
+REVALIDATE = 'private, no-cache'
+
+DataVersion = namedtuple('DataVersion', 'newest_id oldest_id deletions last_modified')
+
+
+def data_version(store_id):
+    """A stamp of a store's receipts that changes whenever a list or report could.
+    
+    Receipts are never edited: they are added (the newest id grows), deleted
+    (a tombstone is added) or archived (the oldest hot id grows). Each part
+    is a min/max over an index that leads with store_id, so the whole stamp
+    is a few index seeks in one statement, whatever the table size.
+    """
+    newest = select(func.max(Receipt.id)).where(Receipt.store_id == store_id).scalar_subquery()
+    deletion = select(func.max(ReceiptTombstone.id)).where(ReceiptTombstone.store_id == store_id).scalar_subquery()
+    row = db.session.execute(select(
+        newest,
+        select(func.min(Receipt.id)).where(Receipt.store_id == store_id).scalar_subquery(),
+        deletion,
+        select(Receipt.date_created).where(Receipt.id == newest).scalar_subquery(),
+        select(ReceiptTombstone.deleted_at).where(ReceiptTombstone.id == deletion).scalar_subquery(),
+    )).one()
+    changes = [moment for moment in row[3:] if moment is not None]
+    last_modified = pytz.UTC.localize(max(changes)) if changes else None
+    return DataVersion(row[0], row[1], row[2], last_modified)
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def has_flashes():
+    """Whether one-time messages are waiting to be shown.
+    
+    A page showing them must not be answered from or kept in a cache.
+    Rendering the page consumes them, so ask before rendering.
+    """
+    return '_flashes' in session
+
+
+def conditional(version):
+    """View decorator: answer If-None-Match / If-Modified-Since before the view runs.
+    
+    version(*args, **kwargs) returns (etag parts, last-modified datetime or
+    None) and must be cheap; the view only runs when the client's copy is out
+    of date. The ETag also covers the URL, query string and admin login.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or has_flashes():
+                return f(*args, **kwargs)
+            parts, last_modified = version(*args, **kwargs)
+            etag = make_etag(request.endpoint, request.query_string, bool(session.get('admin_logged_in')), parts)
+            
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = REVALIDATE
+            return response
+        return decorated_function
+    return decorator
+
+
+def daily_last_modified(last_modified, today_start):
+    """Reports that default to today change at local midnight even without new data"""
+    today_start = pytz.UTC.localize(today_start)
+    return max(last_modified, today_start) if last_modified else today_start
+
+
+def immutable_page(html, cacheable=True):
+    """Response for a page that never changes once rendered, e.g. a receipt.
+    
+    The ETag is a hash of the HTML, so a matching If-None-Match gets a 304,
+    and shared caches may keep the page for RECEIPT_PAGE_MAX_AGE seconds;
+    the limit bounds how long a deleted receipt can still be served.
+    Pass cacheable=False for a copy rendered with one-time messages.
+    """
+    response = make_response(html)
+    if not cacheable:
+        return response
+    response.set_etag(hashlib.sha1(html.encode()).hexdigest()[:20])
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['RECEIPT_PAGE_MAX_AGE']}"
+    return response.make_conditional(request)
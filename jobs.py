@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+
+from models import db, Job
+
+PROGRESS_INTERVAL = 1.0
+
+
+class JobRunner:
+    """Runs registered export/report functions on a thread pool outside the request cycle.
+
+    Job state lives in the job table so any worker can report progress;
+    results are files in artifacts_dir, removed ttl seconds after the job
+    finished. Submitting the same kind and parameters again returns the
+    existing queued, running or finished job instead of starting a new one,
+    as long as the data version it was submitted with is unchanged.
+    """
+    
+    def __init__(self, app=None, artifacts_dir=None, max_workers=2, ttl=3600, stale_after=3600):
+        self.app = app
+        self.artifacts_dir = artifacts_dir
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.max_workers = max_workers
+        self.kinds = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+    
+    def init_app(self, app):
+        """Run jobs for app, configured by JOB_ARTIFACTS_DIR, JOB_WORKERS and JOB_TTL_SECONDS"""
+        self.app = app
+        self.artifacts_dir = app.config.get('JOB_ARTIFACTS_DIR') or os.path.join(app.instance_path, 'artifacts')
+        self.max_workers = app.config.get('JOB_WORKERS', self.max_workers)
+        self.ttl = app.config.get('JOB_TTL_SECONDS', self.ttl)
+    
+    def register(self, kind, func, suffix, mimetype):
+        """func(path, params, progress) writes the result for params to path"""
+        self.kinds[kind] = (func, suffix, mimetype)
+    
+    def _pool(self):
+        with self._lock:
+            # Pools do not survive a fork, so each worker creates its own
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='receipt-job')
+            return self._executor
+    
+    @staticmethod
+    def params_key(kind, params, version=None):
+        raw = json.dumps([kind, params, version], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    def artifact_path(self, job):
+        return os.path.join(self.artifacts_dir, job.artifact_name) if job.artifact_name else None
+    
+    def submit(self, kind, params, version=None):
+        """Start a job, or return the live job already computing the same result.
+        
+        version is any JSON value that changes when the job's input data
+        does; a finished job is only reused for the version it was run on.
+        """
+        if kind not in self.kinds:
+            raise ValueError(f'Unknown job kind: {kind}')
+        self.cleanup()
+        
+        key = self.params_key(kind, params, version)
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        existing = Job.query.filter(
+            Job.params_key == key,
+            or_(
+                Job.status == 'done',
+                and_(Job.status.in_(('queued', 'running')), Job.updated_at >= stale_before)
+            )
+        ).order_by(Job.created_at.desc()).first()
+        if existing:
+            return existing
+        
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=json.dumps(params, sort_keys=True),
+                  params_key=key, status='queued', progress=0)
+        db.session.add(job)
+        db.session.commit()
+        self._pool().submit(self._run, job.id)
+        return job
+    
+    def _run(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(Job, job_id)
+            func, suffix, _ = self.kinds[job.kind]
+            job.status = 'running'
+            db.session.commit()
+            
+            os.makedirs(self.artifacts_dir, exist_ok=True)
+            artifact_name = f'{job.id}{suffix}'
+            path = os.path.join(self.artifacts_dir, artifact_name)
+            last_update = [time.monotonic()]
+            
+            def progress(done, total):
+                # Throttle progress writes; each one is a small commit
+                now = time.monotonic()
+                if total and now - last_update[0] >= PROGRESS_INTERVAL:
+                    last_update[0] = now
+                    self._set_progress(job_id, min(done / total, 0.99))
+            
+            try:
+                func(path, json.loads(job.params), progress)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error("Job %s (%s) failed: %s", job.id, job.kind, e)
+                if os.path.exists(path):
+                    os.remove(path)
+                job.status = 'failed'
+                job.error = str(e)
+            else:
+                job.status = 'done'
+                job.progress = 1.0
+                job.artifact_name = artifact_name
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+    
+    def _set_progress(self, job_id, value):
+        # In its own short transaction, so the job's session (and whatever the
+        # export has loaded into it) is not committed and expired mid-run
+        with db.engine.begin() as conn:
+            conn.execute(update(Job).where(Job.id == job_id).values(progress=value))
+    
+    def cleanup(self):
+        """Delete jobs (and their files) that finished more than ttl seconds ago"""
+        expired = Job.query.filter(
+            Job.finished_at < datetime.utcnow() - timedelta(seconds=self.ttl)
+        ).all()
+        for job in expired:
+            path = self.artifact_path(job)
+            if path and os.path.exists(path):
+                os.remove(path)
+            db.session.delete(job)
+        if expired:
+            db.session.commit()
+        return len(expired)
+    
+    def describe(self, job):
+        return {
+            'id': job.id,
+            'kind': job.kind,
+            'params': json.loads(job.params),
+            'status': job.status,
+            'progress': round(job.progress, 3),
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
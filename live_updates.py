@@ -0,0 +1,299 @@
+import atexit
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+from models import db, Receipt
+import archive
+import http_cache
+import reporting
+from localtime import local_day, local_day_range, local_today
+
+SUBSCRIBER_QUEUE_SIZE = 100
+# Largest datagram a worker reads; a change is a few hundred bytes
+MAX_MESSAGE_SIZE = 64 * 1024
+
+
+def receipt_added(receipt):
+    """The change published after a receipt is committed"""
+    return {
+        'type': 'receipt_added',
+        'receipt_id': receipt.id,
+        'receipt_number': receipt.receipt_number,
+        'amount': float(receipt.total_amount or 0),
+        'attendant': receipt.attendant,
+        'day': local_day(receipt.date_created).isoformat(),
+    }
+
+
+def receipt_deleted(receipt, tombstone):
+    """The change published after a receipt is deleted; tombstone must be flushed"""
+    return {
+        'type': 'receipt_deleted',
+        'tombstone_id': tombstone.id,
+        'receipt_number': receipt.receipt_number,
+        'amount': float(receipt.total_amount or 0),
+        'attendant': receipt.attendant,
+        'day': local_day(receipt.date_created).isoformat(),
+    }
+
+
+def format_event(event, data):
+    """One Server-Sent Events message"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class StoreTotals:
+    """A store's dashboard figures, loaded once and then moved by each change.
+    
+    today_numbers holds the numbers of today's receipts the loaded figures
+    include, so a change that arrives after the load but was committed
+    before it is not counted twice, and one committed after it is counted
+    even if a higher id was already loaded (ids are not committed in order).
+    Receipts of other days only move total_receipts; for them newest_id and
+    deletions, the receipt and tombstone ids already included, are the
+    check.
+    """
+    
+    def __init__(self, store_id):
+        today = local_today()
+        version = http_cache.data_version(store_id)
+        bucket = reporting.sales_by_day(store_id, today, today).get(today, {})
+        start, end = local_day_range(today)
+        self.day = today
+        self.today_sales = bucket.get('total', 0.0)
+        self.today_receipts = bucket.get('receipts_count', 0)
+        self.today_numbers = {number for number, in db.session.query(Receipt.receipt_number).filter(
+            Receipt.store_id == store_id, Receipt.date_created >= start, Receipt.date_created < end)}
+        self.total_receipts = archive.count_receipts(store_id)
+        self.newest_id = version.newest_id or 0
+        self.deletions = version.deletions or 0
+    
+    def apply(self, change):
+        """Move the figures by one change; False if they already included it"""
+        today = change['day'] == self.day.isoformat()
+        number = change['receipt_number']
+        if change['type'] == 'receipt_added':
+            if today:
+                if number in self.today_numbers:
+                    return False
+                self.today_numbers.add(number)
+            elif change['receipt_id'] <= self.newest_id:
+                return False
+            sign = 1
+        else:
+            if today:
+                if number not in self.today_numbers:
+                    return False
+                self.today_numbers.discard(number)
+            elif change['tombstone_id'] <= self.deletions:
+                return False
+            sign = -1
+        self.total_receipts += sign
+        if today:
+            self.today_sales = round(self.today_sales + sign * change['amount'], 2)
+            self.today_receipts += sign
+        return True
+    
+    def as_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'today_sales': self.today_sales,
+            'today_receipts': self.today_receipts,
+            'total_receipts': self.total_receipts,
+        }
+
+
+class Subscription:
+    def __init__(self, store_id):
+        self.store_id = store_id
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        # Set when the dashboard fell too far behind and was dropped
+        self.dropped = False
+
+
+class LiveBroker:
+    """Fans receipt changes out to the dashboards streaming /admin/live.
+    
+    The worker that commits a receipt publishes the change once: its own
+    dashboards get one pre-formatted message each, and every other worker on
+    the host that has dashboards open gets one datagram on its Unix socket in
+    socket_dir and fans it out the same way. Nothing is recomputed per
+    dashboard; each worker keeps per-store totals that the changes move.
+    Without Unix sockets (Windows) only the publishing worker's dashboards
+    are updated.
+    """
+    
+    def __init__(self, app=None, socket_dir=None):
+        self.app = app
+        self.socket_dir = socket_dir
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._totals = {}
+        self._pid = None
+        self._socket_path = None
+        self._sender = None
+        atexit.register(self.close)
+    
+    def init_app(self, app):
+        """Publish for app; worker sockets live in LIVE_SOCKET_DIR"""
+        self.app = app
+        self.socket_dir = app.config.get('LIVE_SOCKET_DIR') or os.path.join(app.instance_path, 'live')
+    
+    def subscribe(self, store_id, max_streams=None):
+        """Register a dashboard of store_id; returns the subscription and the store's current totals.
+        
+        Returns (None, None) when this worker already streams to max_streams
+        dashboards.
+        """
+        self._ensure_listening()
+        subscription = Subscription(store_id)
+        with self._lock:
+            if max_streams is not None and sum(map(len, self._subscribers.values())) >= max_streams:
+                return None, None
+            totals, _ = self._current_totals(store_id)
+            self._subscribers.setdefault(store_id, set()).add(subscription)
+            return subscription, totals.as_dict()
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.get(subscription.store_id, set()).discard(subscription)
+    
+    def publish(self, store_id, change):
+        """Deliver a committed change to this worker's dashboards and to the other workers"""
+        # The change is already committed, so a failure here must not fail the request
+        try:
+            self._deliver(store_id, change)
+            if self.socket_dir and hasattr(socket, 'AF_UNIX'):
+                self._send_to_peers(json.dumps({'store_id': store_id, 'change': change}).encode())
+        except Exception as e:
+            self.app.logger.warning("Publishing a live update failed: %s", e)
+    
+    def _current_totals(self, store_id):
+        """(totals, whether they were just loaded); called with the lock held, in an app context"""
+        totals = self._totals.get(store_id)
+        if totals is not None and totals.day == local_today():
+            return totals, False
+        totals = self._totals[store_id] = StoreTotals(store_id)
+        return totals, True
+    
+    def _deliver(self, store_id, change):
+        with self._lock:
+            subscribers = self._subscribers.get(store_id)
+            if store_id not in self._totals and not subscribers:
+                return
+            totals, loaded = self._current_totals(store_id)
+            # Totals loaded just now already include the change, but the
+            # dashboards still need to hear about it
+            if not (totals.apply(change) or loaded) or not subscribers:
+                return
+            message = format_event('sales', dict(change, totals=totals.as_dict()))
+            for subscription in list(subscribers):
+                try:
+                    subscription.queue.put_nowait(message)
+                except queue.Full:
+                    # A dashboard this far behind is dropped; its browser
+                    # reconnects and starts over from fresh totals
+                    subscribers.discard(subscription)
+                    subscription.dropped = True
+    
+    def _ensure_listening(self):
+        with self._lock:
+            # Sockets and threads do not survive a fork, so each worker binds its own
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._subscribers = {}
+            self._totals = {}
+            self._sender = None
+            if not self.socket_dir or not hasattr(socket, 'AF_UNIX'):
+                return
+            os.makedirs(self.socket_dir, exist_ok=True)
+            path = os.path.join(self.socket_dir, f'{os.getpid()}.sock')
+            if os.path.exists(path):
+                os.remove(path)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            listener.bind(path)
+            self._socket_path = path
+            threading.Thread(target=self._listen, args=(listener,), name='live-updates', daemon=True).start()
+    
+    def _listen(self, listener):
+        with self.app.app_context():
+            while True:
+                data = listener.recv(MAX_MESSAGE_SIZE)
+                try:
+                    message = json.loads(data)
+                    self._deliver(message['store_id'], message['change'])
+                except Exception as e:
+                    self.app.logger.warning("Dropped a live update: %s", e)
+                finally:
+                    db.session.remove()
+    
+    def _send_to_peers(self, message):
+        try:
+            names = os.listdir(self.socket_dir)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._sender is None:
+                self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._sender.setblocking(False)
+            sender = self._sender
+        for name in names:
+            path = os.path.join(self.socket_dir, name)
+            if not name.endswith('.sock') or path == self._socket_path:
+                continue
+            try:
+                sender.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that has exited
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            except OSError:
+                # The worker's buffer is full; its dashboards miss this change
+                pass
+    
+    def close(self):
+        """Remove this worker's socket"""
+        if self._socket_path and self._pid == os.getpid():
+            try:
+                os.remove(self._socket_path)
+            except OSError:
+                pass
+    
+    def busy(self, retry_seconds):
+        """The whole stream for a dashboard turned away by the stream limit.
+        
+        EventSource gives up for good on an error status, so this is an
+        ordinary stream that ends at once after asking the browser to
+        reconnect later.
+        """
+        yield f'retry: {int(retry_seconds * 1000)}\n\n'
+        yield format_event('busy', {'retry_seconds': retry_seconds})
+    
+    def stream(self, subscription, totals, heartbeat, max_seconds):
+        """Server-Sent Events for one dashboard: its store's totals, then each change.
+        
+        Ends after max_seconds (the browser reconnects on its own), so a
+        connection never pins a worker thread indefinitely; a comment every
+        heartbeat seconds keeps proxies from closing an idle stream.
+        """
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield 'retry: 3000\n\n'
+            yield format_event('totals', totals)
+            while not subscription.dropped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    yield subscription.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscription)
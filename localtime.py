@@ -0,0 +1,44 @@
+import os
+from datetime import datetime, timedelta
+import pytz
+
+# Receipts store naive UTC timestamps; reports and receipts are shown in the
+# business's local time
+LOCAL_TIMEZONE = pytz.timezone(os.environ.get('RECEIPT_TIMEZONE', 'Asia/Manila'))
+
+
+def to_local(dt):
+    """Convert a naive UTC datetime to an aware local datetime"""
+    return pytz.UTC.localize(dt).astimezone(LOCAL_TIMEZONE)
+
+
+def local_now():
+    """The current local time"""
+    return datetime.now(LOCAL_TIMEZONE)
+
+
+def local_today():
+    """Today's local calendar date"""
+    return local_now().date()
+
+
+def local_day(dt):
+    """The local calendar date of a naive UTC datetime"""
+    return to_local(dt).date()
+
+
+def local_day_start(day):
+    """The naive UTC datetime at which a local calendar day begins"""
+    midnight = LOCAL_TIMEZONE.localize(datetime.combine(day, datetime.min.time()))
+    return midnight.astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+def local_day_range(start_date, end_date=None):
+    """Half-open naive UTC [start, end) range covering local days start_date..end_date.
+
+    Filtering with `column >= start` and `column < end` keeps the bare
+    column on the left so an index on it can be used, unlike DATE(column).
+    """
+    if end_date is None:
+        end_date = start_date
+    return local_day_start(start_date), local_day_start(end_date + timedelta(days=1))
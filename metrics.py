@@ -0,0 +1,161 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    """Minimal Prometheus-style histogram with one series per endpoint"""
+    
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+    
+    def observe(self, endpoint, value):
+        with self._lock:
+            series = self._series.get(endpoint)
+            if series is None:
+                series = self._series[endpoint] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def reset(self):
+        with self._lock:
+            self._series = {}
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for endpoint, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{endpoint="{endpoint}"}} {total:.6f}')
+                lines.append(f'{self.name}_count{{endpoint="{endpoint}"}} {count}')
+        return lines
+
+
+request_latency = Histogram('receipts_request_duration_seconds',
+                            'Time to build the response, per endpoint', LATENCY_BUCKETS)
+request_sql_time = Histogram('receipts_request_sql_seconds',
+                             'Time spent in SQL statements per request', LATENCY_BUCKETS)
+request_queries = Histogram('receipts_request_queries',
+                            'SQL statements executed per request', QUERY_COUNT_BUCKETS)
+
+# The slowest statement seen so far for each endpoint: (seconds, statement)
+_slowest = {}
+_slowest_lock = threading.Lock()
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'query_count', 'sql_time', 'slowest_time', 'slowest_statement')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    # Statements from background threads (group commit, jobs) have no request
+    if not has_request_context():
+        return
+    metrics = g.get('request_metrics')
+    if metrics is None:
+        return
+    metrics.query_count += 1
+    metrics.sql_time += elapsed
+    if elapsed > metrics.slowest_time:
+        metrics.slowest_time = elapsed
+        metrics.slowest_statement = statement
+
+
+def _start_request():
+    g.request_metrics = RequestMetrics()
+
+
+def _finish_request(response):
+    metrics = g.get('request_metrics')
+    if metrics is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    if response.is_streamed:
+        # A streamed body renders and queries after this hook, so its
+        # metrics are recorded once the server has sent all of it
+        response.call_on_close(lambda: _record(endpoint, metrics))
+        return response
+    
+    g.pop('request_metrics')
+    elapsed = _record(endpoint, metrics)
+    response.headers.add('Server-Timing', (
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.query_count} queries", '
+        f'db-slowest;dur={metrics.slowest_time * 1000:.1f}, '
+        f'app;dur={elapsed * 1000:.1f}'
+    ))
+    return response
+
+
+def _record(endpoint, metrics):
+    """Add a finished request to the histograms; returns its duration"""
+    elapsed = time.perf_counter() - metrics.started
+    request_latency.observe(endpoint, elapsed)
+    request_sql_time.observe(endpoint, metrics.sql_time)
+    request_queries.observe(endpoint, metrics.query_count)
+    if metrics.slowest_statement:
+        with _slowest_lock:
+            if metrics.slowest_time > _slowest.get(endpoint, (0.0, None))[0]:
+                _slowest[endpoint] = (metrics.slowest_time, metrics.slowest_statement)
+    return elapsed
+
+
+def render():
+    """All histograms in the Prometheus text exposition format.
+
+    Values are per worker process; scrape each worker or aggregate upstream.
+    """
+    lines = []
+    for histogram in (request_latency, request_sql_time, request_queries):
+        lines.extend(histogram.render())
+    with _slowest_lock:
+        for endpoint, (seconds, statement) in sorted(_slowest.items()):
+            # Plain comments are ignored by Prometheus but useful when reading by hand
+            lines.append(f'# slowest statement for {endpoint} ({seconds * 1000:.1f} ms): '
+                         + ' '.join(statement.split()))
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Forget everything recorded so far in this process"""
+    for histogram in (request_latency, request_sql_time, request_queries):
+        histogram.reset()
+    with _slowest_lock:
+        _slowest.clear()
+
+
+def init_app(app):
+    """Record SQL and timing metrics for every request of the app"""
+    # Engine-wide listeners; a second app in the process must not count every statement twice
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
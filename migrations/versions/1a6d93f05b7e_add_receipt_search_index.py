@@ -0,0 +1,43 @@
+"""add receipt search index
+
+Revision ID: 1a6d93f05b7e
+Revises: e93b70d4a1c6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '1a6d93f05b7e'
+down_revision = 'e93b70d4a1c6'
+branch_labels = None
+depends_on = None
+
+# The search table as of this revision. Fixed here rather than read from
+# search.py, which describes the current schema
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS receipt_search USING fts5(
+        receipt_number, customer_name, customer_address, items,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+POSTGRESQL_DDL = [
+    """CREATE TABLE IF NOT EXISTS receipt_search (
+        receipt_id INTEGER PRIMARY KEY,
+        document TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_receipt_search_document ON receipt_search USING GIN (document)",
+]
+
+
+def upgrade():
+    # FTS5 on SQLite, tsvector + GIN on PostgreSQL; nothing elsewhere.
+    # Run `flask rebuild-search-index` afterwards to index existing receipts.
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DDL, 'postgresql': POSTGRESQL_DDL}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS receipt_search")
@@ -0,0 +1,80 @@
+"""add daily sales rollup
+
+Revision ID: 3c9e5d1a7b24
+Revises: 4f2a9c1d7e30
+Create Date: 2026-10-17 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from localtime import local_day
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e5d1a7b24'
+down_revision = '4f2a9c1d7e30'
+branch_labels = None
+depends_on = None
+
+# The tables as they are at this revision
+receipt = sa.table('receipt',
+    sa.column('id', sa.Integer()),
+    sa.column('date_created', sa.DateTime()),
+    sa.column('attendant', sa.String()),
+    sa.column('total_amount', sa.Numeric(precision=10, scale=2)),
+)
+receipt_item = sa.table('receipt_item',
+    sa.column('receipt_id', sa.Integer()),
+    sa.column('quantity', sa.Integer()),
+)
+
+
+def fill_rollup(rollup):
+    """Bucket the existing receipts by local day and attendant, as reporting.rebuild_rollup does"""
+    quantities = sa.select(
+        receipt_item.c.receipt_id,
+        sa.func.sum(receipt_item.c.quantity).label('quantity')
+    ).group_by(receipt_item.c.receipt_id).subquery()
+    receipts = sa.select(
+        receipt.c.date_created,
+        receipt.c.attendant,
+        receipt.c.total_amount,
+        sa.func.coalesce(quantities.c.quantity, 0)
+    ).select_from(receipt.outerjoin(quantities, quantities.c.receipt_id == receipt.c.id))
+
+    buckets = {}
+    for created, attendant, total, quantity in op.get_bind().execute(receipts):
+        if created is None:
+            continue
+        bucket = buckets.setdefault((local_day(created), attendant), [0, 0, 0])
+        bucket[0] += total or 0
+        bucket[1] += 1
+        bucket[2] += int(quantity)
+
+    op.execute(rollup.delete())
+    if buckets:
+        op.bulk_insert(rollup, [
+            {'day': day, 'attendant': attendant, 'total_amount': total,
+             'receipts_count': count, 'items_quantity': quantity}
+            for (day, attendant), (total, count, quantity) in buckets.items()
+        ])
+
+
+def upgrade():
+    # if_not_exists: databases stamped with the baseline before this revision
+    # existed already have the table; it is refilled either way
+    rollup = op.create_table('daily_sales_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('attendant', sa.String(length=100), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('receipts_count', sa.Integer(), nullable=False),
+    sa.Column('items_quantity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'attendant'),
+    if_not_exists=True
+    )
+    fill_rollup(rollup)
+
+
+def downgrade():
+    op.drop_table('daily_sales_rollup')
@@ -0,0 +1,65 @@
+"""baseline schema
+
+Revision ID: 4f2a9c1d7e30
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2a9c1d7e30'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables as created by db.create_all() before migrations were introduced.
+    # Existing databases should be stamped with this revision, not upgraded.
+    op.create_table('business_info',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('business_name', sa.String(length=200), nullable=False),
+    sa.Column('business_email', sa.String(length=200), nullable=True),
+    sa.Column('contact_number', sa.String(length=50), nullable=False),
+    sa.Column('location', sa.String(length=200), nullable=False),
+    sa.Column('attendant', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('receipt',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('receipt_number', sa.String(length=50), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('business_name', sa.String(length=200), nullable=False),
+    sa.Column('business_email', sa.String(length=200), nullable=True),
+    sa.Column('contact_number', sa.String(length=50), nullable=False),
+    sa.Column('location', sa.String(length=200), nullable=False),
+    sa.Column('attendant', sa.String(length=100), nullable=False),
+    sa.Column('customer_name', sa.String(length=100), nullable=True),
+    sa.Column('customer_address', sa.Text(), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('money_received', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('change_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('receipt_number')
+    )
+    op.create_table('receipt_item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('receipt_id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['receipt_id'], ['receipt.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('receipt_item')
+    op.drop_table('receipt')
+    op.drop_table('business_info')
@@ -0,0 +1,65 @@
+"""add receipt archive tables
+
+Revision ID: 5b8e2d7c3a91
+Revises: 1a6d93f05b7e
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2d7c3a91'
+down_revision = '1a6d93f05b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: db.create_all() may already have created these tables
+    op.create_table('archived_receipt',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('receipt_number', sa.String(length=50), nullable=False),
+    sa.Column('date_created', sa.DateTime(), nullable=True),
+    sa.Column('business_name', sa.String(length=200), nullable=False),
+    sa.Column('business_email', sa.String(length=200), nullable=True),
+    sa.Column('contact_number', sa.String(length=50), nullable=False),
+    sa.Column('location', sa.String(length=200), nullable=False),
+    sa.Column('attendant', sa.String(length=100), nullable=False),
+    sa.Column('customer_name', sa.String(length=100), nullable=True),
+    sa.Column('customer_address', sa.Text(), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('money_received', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('change_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('receipt_number'),
+    if_not_exists=True
+    )
+    with op.batch_alter_table('archived_receipt', schema=None) as batch_op:
+        batch_op.create_index('ix_archived_receipt_date_created', ['date_created'], unique=False, if_not_exists=True)
+
+    op.create_table('archived_receipt_item',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('receipt_id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['receipt_id'], ['archived_receipt.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    with op.batch_alter_table('archived_receipt_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_receipt_item_receipt_id'), ['receipt_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('archived_receipt_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_receipt_item_receipt_id'))
+
+    op.drop_table('archived_receipt_item')
+    with op.batch_alter_table('archived_receipt', schema=None) as batch_op:
+        batch_op.drop_index('ix_archived_receipt_date_created')
+
+    op.drop_table('archived_receipt')
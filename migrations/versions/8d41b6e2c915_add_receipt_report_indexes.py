@@ -0,0 +1,34 @@
+"""add receipt report indexes
+
+Revision ID: 8d41b6e2c915
+Revises: 3c9e5d1a7b24
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41b6e2c915'
+down_revision = '3c9e5d1a7b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: db.create_all() may already have created these on newer databases
+    with op.batch_alter_table('receipt', schema=None) as batch_op:
+        batch_op.create_index('ix_receipt_date_created', ['date_created'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_receipt_attendant_date_created', ['attendant', 'date_created'], unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('receipt_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_receipt_item_receipt_id'), ['receipt_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('receipt_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_receipt_item_receipt_id'))
+
+    with op.batch_alter_table('receipt', schema=None) as batch_op:
+        batch_op.drop_index('ix_receipt_attendant_date_created')
+        batch_op.drop_index('ix_receipt_date_created')
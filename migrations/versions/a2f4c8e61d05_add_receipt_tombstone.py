@@ -0,0 +1,32 @@
+"""add receipt tombstone
+
+Revision ID: a2f4c8e61d05
+Revises: 5b8e2d7c3a91
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2f4c8e61d05'
+down_revision = '5b8e2d7c3a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: db.create_all() may already have created this table
+    op.create_table('receipt_tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('receipt_id', sa.Integer(), nullable=False),
+    sa.Column('receipt_number', sa.String(length=50), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('receipt_tombstone')
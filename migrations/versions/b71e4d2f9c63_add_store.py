@@ -0,0 +1,172 @@
+"""add store and scope business info, receipts and the rollup to it
+
+Revision ID: b71e4d2f9c63
+Revises: d6c1f04b8a27
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e4d2f9c63'
+down_revision = 'd6c1f04b8a27'
+branch_labels = None
+depends_on = None
+
+# Existing data becomes the first store; its code is the DEFAULT_STORE default
+DEFAULT_STORE_ID = 1
+DEFAULT_STORE_CODE = 'main'
+
+STORE_TABLES = ('receipt', 'archived_receipt', 'receipt_tombstone')
+
+# Indexes leading with store_id replace the date indexes
+OLD_INDEXES = (
+    ('receipt', 'ix_receipt_date_created', ['date_created']),
+    ('receipt', 'ix_receipt_attendant_date_created', ['attendant', 'date_created']),
+    ('archived_receipt', 'ix_archived_receipt_date_created', ['date_created']),
+)
+NEW_INDEXES = (
+    ('receipt', 'ix_receipt_store_date_created', ['store_id', 'date_created']),
+    ('receipt', 'ix_receipt_store_attendant_date_created', ['store_id', 'attendant', 'date_created']),
+    ('receipt', 'ix_receipt_store_id', ['store_id', 'id']),
+    ('archived_receipt', 'ix_archived_receipt_store_date_created', ['store_id', 'date_created']),
+    ('archived_receipt', 'ix_archived_receipt_store_id', ['store_id', 'id']),
+    ('receipt_tombstone', 'ix_receipt_tombstone_store_id', ['store_id', 'id']),
+)
+
+ROLLUP_COLUMNS = 'day, attendant, total_amount, receipts_count, items_quantity'
+
+# The SQLite search table after and before this revision. Fixed here rather
+# than read from search.py, which describes the current schema
+SQLITE_SEARCH_DDL = """CREATE VIRTUAL TABLE receipt_search USING fts5(
+    receipt_number, customer_name, customer_address, items, store,
+    tokenize = 'unicode61 remove_diacritics 2'
+)"""
+OLD_SQLITE_SEARCH_DDL = """CREATE VIRTUAL TABLE receipt_search USING fts5(
+    receipt_number, customer_name, customer_address, items,
+    tokenize = 'unicode61 remove_diacritics 2'
+)"""
+SEARCH_COLUMNS = 'receipt_number, customer_name, customer_address, items'
+
+
+def create_rollup_table(name, with_store):
+    columns = [
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('attendant', sa.String(length=100), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('receipts_count', sa.Integer(), nullable=False),
+        sa.Column('items_quantity', sa.Integer(), nullable=False),
+    ]
+    if with_store:
+        columns.insert(0, sa.Column('store_id', sa.Integer(), nullable=False))
+        op.create_table(name, *columns,
+            sa.ForeignKeyConstraint(['store_id'], ['store.id'], name='fk_daily_sales_rollup_store_id_store'),
+            sa.PrimaryKeyConstraint('store_id', 'day', 'attendant'))
+    else:
+        op.create_table(name, *columns, sa.PrimaryKeyConstraint('day', 'attendant'))
+
+
+def replace_rollup(with_store, select):
+    """Swap daily_sales_rollup for a copy with a different primary key, filled by select"""
+    dialect = op.get_bind().dialect.name
+    create_rollup_table('daily_sales_rollup_new', with_store)
+    op.execute(f"INSERT INTO daily_sales_rollup_new {select}")
+    op.drop_table('daily_sales_rollup')
+    op.rename_table('daily_sales_rollup_new', 'daily_sales_rollup')
+    if dialect == 'postgresql':
+        op.execute("ALTER INDEX daily_sales_rollup_new_pkey RENAME TO daily_sales_rollup_pkey")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    # if_not_exists: db.create_all() may already have created this table
+    op.create_table('store',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    if_not_exists=True
+    )
+    op.execute(
+        "INSERT INTO store (id, code, name, created_at) "
+        f"SELECT {DEFAULT_STORE_ID}, '{DEFAULT_STORE_CODE}', "
+        "COALESCE((SELECT business_name FROM business_info ORDER BY id LIMIT 1), 'Main store'), CURRENT_TIMESTAMP "
+        f"WHERE NOT EXISTS (SELECT 1 FROM store WHERE id = {DEFAULT_STORE_ID})"
+    )
+    if dialect == 'postgresql':
+        # The row above was inserted with an explicit id
+        op.execute("SELECT setval(pg_get_serial_sequence('store', 'id'), (SELECT max(id) FROM store))")
+
+    # Only the first business_info row was ever read; it becomes the first store's
+    op.execute("DELETE FROM business_info WHERE id <> (SELECT min(id) FROM business_info)")
+    op.add_column('business_info', sa.Column('store_id', sa.Integer(), nullable=True))
+    op.execute(f"UPDATE business_info SET store_id = {DEFAULT_STORE_ID}")
+    with op.batch_alter_table('business_info', schema=None) as batch_op:
+        batch_op.alter_column('store_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_unique_constraint(batch_op.f('uq_business_info_store_id'), ['store_id'])
+        batch_op.create_foreign_key(batch_op.f('fk_business_info_store_id_store'), 'store', ['store_id'], ['id'])
+
+    for table, name, _ in OLD_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+    for table in STORE_TABLES:
+        op.add_column(table, sa.Column('store_id', sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {table} SET store_id = {DEFAULT_STORE_ID}")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('store_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(batch_op.f(f'fk_{table}_store_id_store'), 'store', ['store_id'], ['id'])
+    for table, name, columns in NEW_INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+    replace_rollup(True, f"(store_id, {ROLLUP_COLUMNS}) SELECT {DEFAULT_STORE_ID}, {ROLLUP_COLUMNS} FROM daily_sales_rollup")
+
+    # Search entries carry the store; existing ones all belong to the first store
+    if dialect == 'sqlite':
+        op.execute("ALTER TABLE receipt_search RENAME TO receipt_search_old")
+        op.execute(SQLITE_SEARCH_DDL)
+        op.execute(
+            f"INSERT INTO receipt_search (rowid, {SEARCH_COLUMNS}, store) "
+            f"SELECT rowid, {SEARCH_COLUMNS}, 's{DEFAULT_STORE_ID}' FROM receipt_search_old"
+        )
+        op.execute("DROP TABLE receipt_search_old")
+    elif dialect == 'postgresql':
+        op.execute(f"ALTER TABLE receipt_search ADD COLUMN store_id INTEGER NOT NULL DEFAULT {DEFAULT_STORE_ID}")
+        op.execute("ALTER TABLE receipt_search ALTER COLUMN store_id DROP DEFAULT")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("ALTER TABLE receipt_search RENAME TO receipt_search_old")
+        op.execute(OLD_SQLITE_SEARCH_DDL)
+        op.execute(f"INSERT INTO receipt_search (rowid, {SEARCH_COLUMNS}) SELECT rowid, {SEARCH_COLUMNS} FROM receipt_search_old")
+        op.execute("DROP TABLE receipt_search_old")
+    elif dialect == 'postgresql':
+        op.execute("ALTER TABLE receipt_search DROP COLUMN store_id")
+
+    # Stores are merged back into one set of totals
+    replace_rollup(False, f"({ROLLUP_COLUMNS}) SELECT day, attendant, sum(total_amount), sum(receipts_count), "
+                          "sum(items_quantity) FROM daily_sales_rollup GROUP BY day, attendant")
+
+    for table, name, _ in NEW_INDEXES:
+        op.drop_index(name, table_name=table)
+    for table in STORE_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(batch_op.f(f'fk_{table}_store_id_store'), type_='foreignkey')
+            batch_op.drop_column('store_id')
+    for table, name, columns in OLD_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    # Keep the first store's business information as the single business
+    op.execute(f"DELETE FROM business_info WHERE store_id <> {DEFAULT_STORE_ID}")
+    with op.batch_alter_table('business_info', schema=None) as batch_op:
+        batch_op.drop_constraint(batch_op.f('fk_business_info_store_id_store'), type_='foreignkey')
+        batch_op.drop_constraint(batch_op.f('uq_business_info_store_id'), type_='unique')
+        batch_op.drop_column('store_id')
+
+    op.drop_table('store')
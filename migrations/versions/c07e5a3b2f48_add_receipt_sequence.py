@@ -0,0 +1,28 @@
+"""add receipt sequence
+
+Revision ID: c07e5a3b2f48
+Revises: 8d41b6e2c915
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c07e5a3b2f48'
+down_revision = '8d41b6e2c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('receipt_sequence',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('next_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+
+def downgrade():
+    op.drop_table('receipt_sequence')
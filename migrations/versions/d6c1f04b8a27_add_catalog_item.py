@@ -0,0 +1,80 @@
+"""add catalog item and reference it from line items
+
+Revision ID: d6c1f04b8a27
+Revises: a2f4c8e61d05
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6c1f04b8a27'
+down_revision = 'a2f4c8e61d05'
+branch_labels = None
+depends_on = None
+
+ITEM_TABLES = ('receipt_item', 'archived_receipt_item')
+
+# Descriptions used on at least this many line items become catalog items;
+# rarer ones are treated as custom items and keep their text
+MIN_USES = 3
+
+
+def upgrade():
+    # if_not_exists: db.create_all() may already have created this table
+    op.create_table('catalog_item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=500), nullable=False),
+    sa.Column('default_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name'),
+    if_not_exists=True
+    )
+    for table in ITEM_TABLES:
+        op.add_column(table, sa.Column('catalog_item_id', sa.Integer(), nullable=True))
+
+    # Deduplicate existing descriptions; each catalog item's default price is
+    # the price on its most recent line (hot and archived ids never overlap)
+    all_items = ' UNION ALL '.join(f"SELECT id, description, price FROM {table}" for table in ITEM_TABLES)
+    op.execute(
+        "INSERT INTO catalog_item (name, default_price, created_at) "
+        f"SELECT items.description, items.price, CURRENT_TIMESTAMP FROM ({all_items}) AS items "
+        f"JOIN (SELECT max(id) AS id FROM ({all_items}) AS counted "
+        f"GROUP BY description HAVING count(*) >= {MIN_USES}) AS latest ON latest.id = items.id "
+        "WHERE items.description NOT IN (SELECT name FROM catalog_item)"
+    )
+    for table in ITEM_TABLES:
+        op.execute(
+            f"UPDATE {table} SET catalog_item_id = "
+            f"(SELECT catalog_item.id FROM catalog_item WHERE catalog_item.name = {table}.description) "
+            f"WHERE description IN (SELECT name FROM catalog_item)"
+        )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('description', new_column_name='custom_description',
+                                  existing_type=sa.String(length=500), nullable=True)
+            batch_op.create_foreign_key(batch_op.f(f'fk_{table}_catalog_item_id_catalog_item'),
+                                        'catalog_item', ['catalog_item_id'], ['id'])
+        op.create_index(op.f(f'ix_{table}_catalog_item_id'), table, ['catalog_item_id'], unique=False, if_not_exists=True)
+
+        op.execute(f"UPDATE {table} SET custom_description = NULL WHERE catalog_item_id IS NOT NULL")
+
+
+def downgrade():
+    for table in ITEM_TABLES:
+        op.execute(
+            f"UPDATE {table} SET custom_description = "
+            f"(SELECT catalog_item.name FROM catalog_item WHERE catalog_item.id = {table}.catalog_item_id) "
+            f"WHERE catalog_item_id IS NOT NULL"
+        )
+        op.drop_index(op.f(f'ix_{table}_catalog_item_id'), table_name=table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(batch_op.f(f'fk_{table}_catalog_item_id_catalog_item'), type_='foreignkey')
+            batch_op.drop_column('catalog_item_id')
+            batch_op.alter_column('custom_description', new_column_name='description',
+                                  existing_type=sa.String(length=500), nullable=False)
+
+    op.drop_table('catalog_item')
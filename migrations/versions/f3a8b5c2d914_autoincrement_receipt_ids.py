@@ -0,0 +1,48 @@
+"""never reuse receipt and receipt item ids
+
+Revision ID: f3a8b5c2d914
+Revises: b71e4d2f9c63
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8b5c2d914'
+down_revision = 'b71e4d2f9c63'
+branch_labels = None
+depends_on = None
+
+# Without AUTOINCREMENT SQLite hands out max(id) + 1, so ids of deleted or
+# archived rows come back; each table's counter starts past every id it
+# has ever given out that is still referenced somewhere
+ID_SOURCES = (
+    ('receipt', ("SELECT max(id) FROM receipt", "SELECT max(id) FROM archived_receipt",
+                 "SELECT max(receipt_id) FROM receipt_tombstone", "SELECT max(rowid) FROM receipt_search")),
+    ('receipt_item', ("SELECT max(id) FROM receipt_item", "SELECT max(id) FROM archived_receipt_item")),
+)
+
+
+def upgrade():
+    # PostgreSQL sequences never hand out an id twice
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table, _ in ID_SOURCES:
+        with op.batch_alter_table(table, schema=None, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': True}):
+            pass
+    for table, sources in ID_SOURCES:
+        highest = ', '.join(f"COALESCE(({source}), 0)" for source in sources)
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(f"INSERT INTO sqlite_sequence (name, seq) VALUES ('{table}', max({highest}))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table, _ in reversed(ID_SOURCES):
+        with op.batch_alter_table(table, schema=None, recreate='always'):
+            pass
@@ -0,0 +1,306 @@
+import os
+import threading
+from datetime import datetime
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import DeclarativeBase
+
+from localtime import local_today
+from replica import RoutingSession
+from sqlite_profile import retry_on_lock
+
+class Base(DeclarativeBase):
+    pass
+
+# Reads of routes marked with replica.replica_reads may go to REPORTING_DATABASE_URL
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
+
+def upsert_insert(dialect):
+    """The INSERT construct with ON CONFLICT support for 'sqlite' or 'postgresql'.
+    
+    Imported on first use: the PostgreSQL dialect alone adds ~25ms to the
+    start of every worker that runs on SQLite.
+    """
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+class Store(db.Model):
+    """A branch; business information, receipts and reports are kept per store"""
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Store {self.code}>'
+
+class BusinessInfo(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # One row per store
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), unique=True, nullable=False)
+    business_name = db.Column(db.String(200), nullable=False)
+    business_email = db.Column(db.String(200))
+    contact_number = db.Column(db.String(50), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    attendant = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<BusinessInfo {self.business_name}>'
+
+class Receipt(db.Model):
+    # Every listing, report and export reads one store, so indexes lead with
+    # store_id and a store's queries never scan other stores' rows
+    __table_args__ = (
+        db.Index('ix_receipt_store_date_created', 'store_id', 'date_created'),
+        db.Index('ix_receipt_store_attendant_date_created', 'store_id', 'attendant', 'date_created'),
+        db.Index('ix_receipt_store_id', 'store_id', 'id'),
+        # Ids are never reused, even after the newest receipts are deleted or
+        # archived: the search index, the archive and sync cursors key on them
+        {'sqlite_autoincrement': True},
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False)
+    # Unique across stores, so /receipt/<number> stays unambiguous
+    receipt_number = db.Column(db.String(50), unique=True, nullable=False)
+    # Stored as naive UTC; see localtime.py for local-day conversions
+    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Business Information
+    business_name = db.Column(db.String(200), nullable=False)
+    business_email = db.Column(db.String(200))
+    contact_number = db.Column(db.String(50), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    attendant = db.Column(db.String(100), nullable=False)
+    
+    # Customer Information
+    customer_name = db.Column(db.String(100))
+    customer_address = db.Column(db.Text)
+    
+    # Receipt totals and payment
+    total_amount = db.Column(db.Numeric(10, 2), default=0)
+    money_received = db.Column(db.Numeric(10, 2), default=0)
+    change_amount = db.Column(db.Numeric(10, 2), default=0)
+    
+    # Relationship to items
+    items = db.relationship('ReceiptItem', backref='receipt', lazy=True, cascade='all, delete-orphan')
+
+    def __init__(self, **kwargs):
+        super(Receipt, self).__init__(**kwargs)
+        if not self.receipt_number:
+            self.receipt_number = receipt_numbers.next_number()
+    
+    def clear_ids(self):
+        """Forget ids assigned by a flush that was rolled back, so the receipt can be inserted again"""
+        self.id = None
+        for item in self.items:
+            item.id = None
+            item.receipt_id = None
+    
+    def __repr__(self):
+        return f'<Receipt {self.receipt_number}>'
+
+class CatalogItem(db.Model):
+    """A product or service offered on the receipt form; line items reference it by id"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(500), unique=True, nullable=False)
+    default_price = db.Column(db.Numeric(10, 2))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CatalogItem {self.name}>'
+
+class ReceiptItem(db.Model):
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    receipt_id = db.Column(db.Integer, db.ForeignKey('receipt.id'), nullable=False, index=True)
+    
+    # Catalog items are stored by id; only custom items keep their own text
+    catalog_item_id = db.Column(db.Integer, db.ForeignKey('catalog_item.id'), index=True)
+    custom_description = db.Column(db.String(500))
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    subtotal = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    catalog_item = db.relationship('CatalogItem', lazy='joined')
+    
+    @property
+    def description(self):
+        return self.catalog_item.name if self.catalog_item_id else self.custom_description
+    
+    def __repr__(self):
+        return f'<ReceiptItem {self.description}>'
+
+class DailySalesRollup(db.Model):
+    """Per-store, per-day, per-attendant sales totals maintained alongside every receipt write"""
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    attendant = db.Column(db.String(100), primary_key=True)
+    
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    receipts_count = db.Column(db.Integer, nullable=False, default=0)
+    items_quantity = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailySalesRollup {self.store_id} {self.day} {self.attendant}>'
+
+class ReceiptSequence(db.Model):
+    """Per-day receipt number counter; processes reserve numbers from it in blocks"""
+    day = db.Column(db.Date, primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+    
+    def __repr__(self):
+        return f'<ReceiptSequence {self.day} {self.next_value}>'
+
+class ReceiptNumberAllocator:
+    """Hands out unique receipt numbers of the form YYYYMMDD-NNNNNN.
+
+    Each process reserves a block of numbers for the current local day with
+    one short transaction on its own connection, then serves the block from
+    memory. Numbers never collide across workers and increase within a
+    worker; numbers left in a block when a worker stops are skipped.
+    """
+    
+    def __init__(self, block_size=50):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._day = None
+        self._next = 0
+        self._end = 0
+    
+    def reset(self):
+        """Drop the reserved block, e.g. after switching to another database"""
+        with self._lock:
+            self._pid = self._day = None
+            self._next = self._end = 0
+    
+    def next_number(self):
+        day = local_today()
+        with self._lock:
+            # A forked worker must not reuse the block reserved by its parent
+            if self._pid != os.getpid() or self._day != day or self._next >= self._end:
+                self._next, self._end = self._reserve(day)
+                self._pid = os.getpid()
+                self._day = day
+            value = self._next
+            self._next += 1
+        return f"{day.strftime('%Y%m%d')}-{value:06d}"
+    
+    def _reserve(self, day):
+        """Reserve [start, end) for the given day"""
+        return retry_on_lock(lambda: self._reserve_once(day))
+    
+    def _reserve_once(self, day):
+        table = ReceiptSequence.__table__
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                table.update()
+                .where(table.c.day == day)
+                .values(next_value=table.c.next_value + self.block_size)
+            ).rowcount
+            if updated:
+                end = conn.execute(
+                    db.select(table.c.next_value).where(table.c.day == day)
+                ).scalar_one()
+                return end - self.block_size, end
+        
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(table.insert().values(day=day, next_value=1 + self.block_size))
+            return 1, 1 + self.block_size
+        except IntegrityError:
+            # Another worker created today's counter first
+            return self._reserve_once(day)
+
+receipt_numbers = ReceiptNumberAllocator(int(os.environ.get('RECEIPT_NUMBER_BLOCK_SIZE', 50)))
+
+class Job(db.Model):
+    """A background export or report run and its downloadable result"""
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False)
+    # Hash of kind and params, used to hand out existing results for identical requests
+    params_key = db.Column(db.String(64), nullable=False, index=True)
+    
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    progress = db.Column(db.Float, nullable=False, default=0)
+    artifact_name = db.Column(db.String(200))
+    error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+class ArchivedReceipt(db.Model):
+    """Receipts moved out of the hot receipt table by archive.py; same columns and ids"""
+    __table_args__ = (
+        db.Index('ix_archived_receipt_store_date_created', 'store_id', 'date_created'),
+        db.Index('ix_archived_receipt_store_id', 'store_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False)
+    receipt_number = db.Column(db.String(50), unique=True, nullable=False)
+    date_created = db.Column(db.DateTime)
+    
+    business_name = db.Column(db.String(200), nullable=False)
+    business_email = db.Column(db.String(200))
+    contact_number = db.Column(db.String(50), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    attendant = db.Column(db.String(100), nullable=False)
+    
+    customer_name = db.Column(db.String(100))
+    customer_address = db.Column(db.Text)
+    
+    total_amount = db.Column(db.Numeric(10, 2), default=0)
+    money_received = db.Column(db.Numeric(10, 2), default=0)
+    change_amount = db.Column(db.Numeric(10, 2), default=0)
+    
+    items = db.relationship('ArchivedReceiptItem', backref='receipt', lazy=True, cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<ArchivedReceipt {self.receipt_number}>'
+
+class ArchivedReceiptItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    receipt_id = db.Column(db.Integer, db.ForeignKey('archived_receipt.id'), nullable=False, index=True)
+    
+    catalog_item_id = db.Column(db.Integer, db.ForeignKey('catalog_item.id'), index=True)
+    custom_description = db.Column(db.String(500))
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    subtotal = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    catalog_item = db.relationship('CatalogItem', lazy='joined')
+    
+    @property
+    def description(self):
+        return self.catalog_item.name if self.catalog_item_id else self.custom_description
+    
+    def __repr__(self):
+        return f'<ArchivedReceiptItem {self.description}>'
+
+class ReceiptTombstone(db.Model):
+    """Record of a deleted receipt, so incremental sync clients can delete it too"""
+    __table_args__ = (
+        db.Index('ix_receipt_tombstone_store_id', 'store_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False)
+    receipt_id = db.Column(db.Integer, nullable=False)
+    receipt_number = db.Column(db.String(50), nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ReceiptTombstone {self.receipt_number}>'
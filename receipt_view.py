@@ -0,0 +1,34 @@
+from localtime import to_local
+
+RECEIPT_FIELDS = (
+    'id', 'receipt_number', 'date_created',
+    'business_name', 'business_email', 'contact_number', 'location', 'attendant',
+    'customer_name', 'customer_address',
+    'total_amount', 'money_received', 'change_amount',
+)
+
+
+class ReceiptView:
+    """Read-only, template-ready view of a saved receipt.
+
+    Dates are converted to local time and items flattened to plain dicts, so
+    rendering never touches the database session.
+    """
+    __slots__ = RECEIPT_FIELDS + ('date', 'time', 'items', 'receipt_items')
+    
+    def __init__(self, receipt):
+        for field in RECEIPT_FIELDS:
+            setattr(self, field, getattr(receipt, field))
+        
+        # Add formatted date and time using local timezone
+        local_time = to_local(receipt.date_created)
+        self.date = local_time.strftime('%B %d, %Y')
+        self.time = local_time.strftime('%I:%M %p')
+        
+        # Ensure items are properly formatted for template
+        self.items = [{'description': item.description, 'quantity': item.quantity,
+                       'price': float(item.price), 'subtotal': float(item.subtotal)}
+                      for item in receipt.items]
+        
+        # Keep the original items relationship name for template compatibility
+        self.receipt_items = self.items
@@ -0,0 +1,429 @@
+import base64
+import os
+import tempfile
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, current_app, flash, redirect, render_template, request, session, stream_template, url_for
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+
+from models import db, Receipt, ReceiptItem, ReceiptTombstone
+import archive
+import catalog
+import exports
+import http_cache
+import live_updates
+import replica
+import reporting
+import search
+import sqlite_profile
+from extensions import catalog_cache, current_business_info, current_store, group_writer, live_broker, receipt_html_cache
+from localtime import to_local
+from receipt_view import ReceiptView
+
+bp = Blueprint('receipts', __name__)
+
+@bp.route('/')
+def index():
+    """Main page with the receipt form"""
+    # Get saved business information
+    business_info = current_business_info()
+    return render_template('form.html', business_info=business_info, catalog_items=list(catalog_cache.get().values()))
+
+def save_receipt(receipt):
+    """Insert a receipt with its rollup and search rows in one transaction"""
+    db.session.add(receipt)
+    db.session.flush()
+    reporting.record_receipt(receipt)
+    search.index_receipt(receipt)
+    db.session.commit()
+
+def rollback_receipt(receipt):
+    """Roll back a failed save_receipt so it can be retried"""
+    db.session.rollback()
+    receipt.clear_ids()
+
+@bp.route('/generate_receipt', methods=['POST'])
+def generate_receipt():
+    """Generate and display the receipt"""
+    try:
+        # Get form data
+        business_name = request.form.get('business_name', '').strip()
+        contact_number = request.form.get('contact_number', '').strip()
+        location = request.form.get('location', '').strip()
+        attendant = request.form.get('attendant', '').strip()
+        
+        # Optional business email
+        business_email = request.form.get('business_email', '').strip()
+        
+        # Optional customer data
+        customer_name = request.form.get('customer_name', '').strip()
+        customer_address = request.form.get('customer_address', '').strip()
+        
+        # Payment data
+        money_received = request.form.get('money_received', '0').strip()
+        
+        # Item data - handle multiple items
+        item_descriptions = request.form.getlist('item_description[]')
+        custom_descriptions = request.form.getlist('custom_description[]')
+        quantities = request.form.getlist('quantity[]')
+        prices = request.form.getlist('price[]')
+        
+        # Debug logging; formatted on the log thread, and only for sampled requests
+        current_app.logger.debug("Receipt form: descriptions=%s quantities=%s prices=%s",
+                                 item_descriptions, quantities, prices)
+        
+        # Ensure we have lists
+        if not isinstance(item_descriptions, list):
+            item_descriptions = [item_descriptions] if item_descriptions else []
+        if not isinstance(custom_descriptions, list):
+            custom_descriptions = [custom_descriptions] if custom_descriptions else []
+        if not isinstance(quantities, list):
+            quantities = [quantities] if quantities else []
+        if not isinstance(prices, list):
+            prices = [prices] if prices else []
+        
+        # Validate required fields
+        if not all([business_name, contact_number, location, attendant]):
+            flash('Please fill in all required business information fields.', 'error')
+            return redirect(url_for('receipts.index'))
+        
+        # Create receipt record
+        receipt = Receipt(
+            store_id=current_store().id,
+            business_name=business_name,
+            business_email=business_email,
+            contact_number=contact_number,
+            location=location,
+            attendant=attendant,
+            customer_name=customer_name,
+            customer_address=customer_address
+        )
+        
+        # Process items
+        total = 0
+        catalog_items = catalog_cache.get()
+        # Items picked from the form's list that are not in the catalog yet;
+        # only an admin adds them, for anyone else they are plain custom text
+        new_catalog_items = {}
+        can_add_to_catalog = bool(session.get('admin_logged_in'))
+        
+        for i in range(len(item_descriptions)):
+            if i < len(quantities) and i < len(prices):
+                desc = item_descriptions[i].strip()
+                # Use custom description if main description is "custom"
+                custom = desc == "custom" and i < len(custom_descriptions)
+                if custom:
+                    desc = custom_descriptions[i].strip()
+                
+                qty_str = quantities[i].strip()
+                price_str = prices[i].strip()
+                
+                # A catalog item with a blank price is charged its default price
+                entry = None if custom else catalog_items.get(desc)
+                if not price_str and entry is not None and entry.default_price is not None:
+                    price_str = str(entry.default_price)
+                
+                if desc and qty_str and price_str:
+                    try:
+                        qty = int(qty_str)
+                        price = float(price_str)
+                        subtotal = qty * price
+                        total += subtotal
+                        
+                        # Create receipt item
+                        receipt_item = ReceiptItem()
+                        if custom:
+                            receipt_item.custom_description = desc
+                        elif entry is not None:
+                            receipt_item.catalog_item_id = entry.id
+                        elif can_add_to_catalog:
+                            new_catalog_items.setdefault(desc, []).append(receipt_item)
+                        else:
+                            receipt_item.custom_description = desc
+                        receipt_item.quantity = qty
+                        receipt_item.price = price
+                        receipt_item.subtotal = subtotal
+                        receipt.items.append(receipt_item)
+                    except (ValueError, TypeError):
+                        flash(f'Invalid quantity or price for item: {desc}', 'error')
+                        return redirect(url_for('receipts.index'))
+        
+        if new_catalog_items:
+            ids = catalog.add_items({desc: items[0].price for desc, items in new_catalog_items.items()})
+            for desc, items in new_catalog_items.items():
+                for receipt_item in items:
+                    receipt_item.catalog_item_id = ids[desc]
+            catalog_cache.invalidate()
+        
+        # Set total and payment information
+        receipt.total_amount = total
+        
+        # Process payment information
+        try:
+            money_received_float = float(money_received) if money_received else 0
+            receipt.money_received = money_received_float
+            receipt.change_amount = money_received_float - float(total)
+        except (ValueError, TypeError):
+            receipt.money_received = 0
+            receipt.change_amount = 0
+        
+        # Save to database
+        try:
+            if current_app.config["RECEIPT_GROUP_COMMIT"]:
+                receipt = group_writer.submit(receipt)
+            else:
+                sqlite_profile.retry_on_lock(lambda: save_receipt(receipt), lambda: rollback_receipt(receipt))
+            current_app.logger.info("Receipt %s saved to database", receipt.receipt_number,
+                                    extra={'receipt_number': receipt.receipt_number})
+            live_broker.publish(receipt.store_id, live_updates.receipt_added(receipt))
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("Database error while saving a receipt")
+            flash('Error saving receipt to database.', 'error')
+            return redirect(url_for('receipts.index'))
+        
+        # Receipts never change once saved, so render once and keep the HTML
+        # for later views and reprints
+        html = render_template('receipt.html', receipt=ReceiptView(receipt))
+        receipt_html_cache.put(receipt_cache_key(receipt.store_id, receipt.receipt_number), html)
+        return html
+        
+    except Exception:
+        current_app.logger.exception("Error generating receipt")
+        flash('An error occurred while generating the receipt. Please try again.', 'error')
+        return redirect(url_for('receipts.index'))
+
+def receipt_cache_key(store_id, receipt_number):
+    """Rendered pages are cached per store, so a store never sees another store's receipt"""
+    return f'{store_id}/{receipt_number}'
+
+RECEIPTS_PER_PAGE = 50
+MAX_RECEIPTS_PER_PAGE = 200
+
+def encode_cursor(receipt):
+    """Encode a receipt's (date_created, id) position as an opaque page cursor"""
+    raw = f"{receipt.date_created.isoformat()}|{receipt.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a page cursor back into (date_created, id), or None if it is invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created, receipt_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created), int(receipt_id)
+    except (ValueError, TypeError):
+        return None
+
+def parse_date_arg(name):
+    """Parse an optional YYYY-MM-DD query parameter"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+def receipt_filters():
+    """The date range, attendant and customer filters from the query string"""
+    return {
+        'start_date': parse_date_arg('start_date'),
+        'end_date': parse_date_arg('end_date'),
+        'attendant': request.args.get('attendant', '').strip(),
+        'customer': request.args.get('customer', '').strip(),
+    }
+
+def filtered_receipts_query():
+    """Build a query over the hot receipts table with the filters from the query string"""
+    filters = receipt_filters()
+    return reporting.filter_receipts(Receipt.query, current_store().id, **filters), filters
+
+def receipts_version():
+    """ETag parts and Last-Modified of the request's store's receipts"""
+    version = http_cache.data_version(current_store().id)
+    return version[:3], version.last_modified
+
+@bp.route('/receipts')
+@replica.replica_reads
+@http_cache.conditional(receipts_version)
+def receipts_list():
+    """List receipts, newest first, one keyset-paginated page at a time"""
+    query, filters = filtered_receipts_query()
+    
+    per_page = request.args.get('per_page', RECEIPTS_PER_PAGE, type=int)
+    per_page = max(1, min(per_page, MAX_RECEIPTS_PER_PAGE))
+    
+    # Seek past the last receipt of the previous page instead of using OFFSET,
+    # so every page costs the same no matter how deep into the history it is
+    cursor = request.args.get('cursor', '').strip()
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created, receipt_id = position
+        query = query.filter(or_(
+            Receipt.date_created < created,
+            and_(Receipt.date_created == created, Receipt.id < receipt_id)
+        ))
+    
+    # Fetch one extra row to know whether another page follows, and load all
+    # items of the page in a single batched query instead of one per receipt
+    receipts = (query.options(selectinload(Receipt.items))
+                .order_by(Receipt.date_created.desc(), Receipt.id.desc())
+                .limit(per_page + 1)
+                .all())
+    has_next = len(receipts) > per_page
+    receipts = receipts[:per_page]
+    next_cursor = encode_cursor(receipts[-1]) if has_next else None
+    
+    # Keep the active filters on the "next page" link
+    next_url = None
+    if next_cursor:
+        next_args = {k: v for k, v in request.args.items() if k != 'cursor'}
+        next_args['cursor'] = next_cursor
+        next_url = url_for('receipts.receipts_list', **next_args)
+    
+    return render_template('receipts_list.html',
+                         receipts=receipts,
+                         filters=filters,
+                         per_page=per_page,
+                         cursor=cursor,
+                         next_cursor=next_cursor,
+                         next_url=next_url)
+
+@bp.route('/receipt/<receipt_number>')
+@replica.replica_reads
+def view_receipt(receipt_number):
+    """View a specific receipt"""
+    store_id = current_store().id
+    key = receipt_cache_key(store_id, receipt_number)
+    # A copy with one-time messages is rendered fresh and kept out of the cache
+    cacheable = not http_cache.has_flashes()
+    html = receipt_html_cache.get(key) if cacheable else None
+    if html is not None:
+        return http_cache.immutable_page(html)
+    
+    receipt = archive.find_receipt(store_id, receipt_number)
+    if receipt is None and replica.reading_replica():
+        # The receipt may be newer than the replica (e.g. a link opened on
+        # another device right after checkout)
+        with replica.primary():
+            receipt = archive.find_receipt(store_id, receipt_number)
+    if receipt is None:
+        abort(404)
+    html = render_template('receipt.html', receipt=ReceiptView(receipt))
+    if cacheable:
+        receipt_html_cache.put(key, html)
+    return http_cache.immutable_page(html, cacheable)
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def stream_file(path, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a file in fixed-size chunks and remove it once it has been sent"""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+@bp.route('/export_excel')
+@replica.replica_reads
+def export_excel():
+    """Export receipts to Excel, optionally limited to a date range"""
+    filters = receipt_filters()
+    queries = reporting.filtered_receipt_queries(current_store().id, **filters)
+    
+    # Save to a temporary file and send it back in chunks
+    fd, export_path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        exports.write_receipts_workbook(export_path, queries)
+    except Exception:
+        os.remove(export_path)
+        raise
+    
+    # Generate filename with current date and the requested range
+    filename = exports.receipts_filename(filters['start_date'], filters['end_date'])
+    
+    response = Response(stream_file(export_path), mimetype=exports.XLSX_MIMETYPE)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Content-Length'] = str(os.path.getsize(export_path))
+    return response
+
+PRINT_BATCH_SIZE = 200
+
+@bp.route('/print_all_receipts')
+@replica.replica_reads
+@http_cache.conditional(receipts_version)
+def print_all_receipts():
+    """Print receipts, optionally limited to a date range and attendant"""
+    filters = receipt_filters()
+    
+    # Receipts are read in batches with their items loaded per batch, and the
+    # page is streamed as it renders, so the first receipts reach the browser
+    # right away and only one batch is held in memory
+    receipts = exports.iter_receipts(reporting.filtered_receipt_queries(current_store().id, **filters), PRINT_BATCH_SIZE)
+    
+    def receipts_data():
+        for receipt in receipts:
+            local_time = to_local(receipt.date_created)
+            yield {
+                'receipt_number': receipt.receipt_number,
+                'date': local_time.strftime('%B %d, %Y'),
+                'time': local_time.strftime('%I:%M %p'),
+                'business_name': receipt.business_name,
+                'business_email': receipt.business_email,
+                'contact_number': receipt.contact_number,
+                'location': receipt.location,
+                'attendant': receipt.attendant,
+                'customer_name': receipt.customer_name,
+                'customer_address': receipt.customer_address,
+                'receipt_items': [{'description': item.description, 'quantity': item.quantity, 
+                                  'price': float(item.price), 'subtotal': float(item.subtotal)} for item in receipt.items],
+                'total': float(receipt.total_amount)
+            }
+    
+    return stream_template('print_all_receipts.html', receipts=receipts_data(), filters=filters)
+
+@bp.route('/new_receipt')
+def new_receipt():
+    """Create a new receipt"""
+    return render_template('form.html', clear_customer_data=True, catalog_items=list(catalog_cache.get().values()))
+
+@bp.route('/delete_receipt/<receipt_number>', methods=['POST'])
+def delete_receipt(receipt_number):
+    """Delete a specific receipt"""
+    try:
+        store_id = current_store().id
+        # Archived receipts still open by number, so they can be deleted too
+        receipt = archive.find_receipt(store_id, receipt_number)
+        if not receipt:
+            flash('Receipt not found.', 'error')
+            return redirect(url_for('receipts.receipts_list'))
+        
+        def remove():
+            reporting.record_receipt(receipt, sign=-1)
+            search.unindex_receipt(receipt.id)
+            tombstone = ReceiptTombstone(receipt_id=receipt.id, store_id=store_id,
+                                         receipt_number=receipt.receipt_number)
+            db.session.add(tombstone)
+            db.session.delete(receipt)
+            db.session.flush()
+            change = live_updates.receipt_deleted(receipt, tombstone)
+            db.session.commit()
+            return change
+        
+        change = sqlite_profile.retry_on_lock(remove, db.session.rollback)
+        receipt_html_cache.evict(receipt_cache_key(store_id, receipt_number))
+        live_broker.publish(store_id, change)
+        flash(f'Receipt #{receipt_number} has been deleted successfully.', 'success')
+        
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Error deleting receipt %s", receipt_number)
+        flash('An error occurred while deleting the receipt.', 'error')
+    
+    return redirect(url_for('receipts.receipts_list'))
@@ -0,0 +1,126 @@
+import re
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+# The SQLALCHEMY_BINDS key of the reporting database
+REPORTING_BIND = 'reporting'
+
+# Session key holding the time until which this client's reads stay on the primary
+PRIMARY_UNTIL_KEY = 'primary_reads_until'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_TEXT_READ = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+
+def is_read(clause):
+    """True for SELECT statements, including text() ones; everything else is a write"""
+    if clause is None:
+        return False
+    if getattr(clause, 'is_select', False):
+        return True
+    return getattr(clause, 'is_text', False) and _TEXT_READ.match(clause.text) is not None
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the reporting database when the app context asks for it.
+    
+    Flushes, DML and anything that is not a SELECT always go to the primary.
+    Reads go to the replica only after use_replica() in the current app
+    context, so routes and jobs opt in and everything else keeps reading its
+    own writes.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and REPORTING_BIND in self._db.engines
+                and reading_replica() and is_read(clause)):
+            return self._db.engines[REPORTING_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def reading_replica():
+    return has_app_context() and g.get('replica_reads', False)
+
+
+def use_replica():
+    """Send the reads of the rest of this app context (request or job) to the replica.
+    
+    A client that wrote within the last REPORTING_READ_YOUR_WRITES_SECONDS
+    keeps reading from the primary, so it sees what it just saved.
+    """
+    if has_request_context() and session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+        return
+    g.replica_reads = True
+
+
+def replica_reads(f):
+    """View decorator: the view's reads, including those of a streamed body, use the replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        use_replica()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+@contextmanager
+def _reads_from_replica(value):
+    previous = g.get('replica_reads', False)
+    g.replica_reads = value
+    try:
+        yield
+    finally:
+        g.replica_reads = previous
+
+
+def primary():
+    """Read from the primary inside this block, e.g. to double-check a miss on the replica"""
+    return _reads_from_replica(False)
+
+
+def reporting():
+    """Read from the replica inside this block: the export part of a background job,
+    whose own status updates around it must read the primary"""
+    return _reads_from_replica(True)
+
+
+def on_primary(loader):
+    """Wrap a cache loader so it never caches data from a lagging replica"""
+    @wraps(loader)
+    def load(*args, **kwargs):
+        if not reading_replica():
+            return loader(*args, **kwargs)
+        with primary():
+            return loader(*args, **kwargs)
+    return load
+
+
+def _mark_write(response):
+    # Any request that may have written starts this client's primary-only window
+    if request.method not in SAFE_METHODS:
+        session[PRIMARY_UNTIL_KEY] = time.time() + current_app.config['REPORTING_READ_YOUR_WRITES_SECONDS']
+    return response
+
+
+def init_app(app):
+    """Add the REPORTING_DATABASE_URL bind; must run before db.init_app().
+    
+    Does nothing unless REPORTING_DATABASE_URL is set.
+    """
+    url = app.config.get('REPORTING_DATABASE_URL')
+    if not url:
+        return
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[REPORTING_BIND] = url
+    app.after_request(_mark_write)
+
+
+def copy_sqlite(source, target):
+    """Copy one SQLite database into another with the online backup API.
+    
+    Stands in for replication when both databases are local files.
+    """
+    with source.raw_connection() as src, target.raw_connection() as dst:
+        src.driver_connection.backup(dst.driver_connection)
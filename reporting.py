@@ -0,0 +1,295 @@
+from datetime import timedelta
+from sqlalchemy import func
+
+from localtime import local_day, local_day_range
+from models import db, Receipt, CatalogItem, DailySalesRollup, upsert_insert
+import archive
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def filter_receipts(query, store_id, start_date=None, end_date=None, attendant=None, customer=None, model=Receipt):
+    """Restrict a receipts query to a store, a local date range, an attendant and a customer name match.
+
+    store_id None means every store (maintenance commands only).
+    """
+    if store_id is not None:
+        query = query.filter(model.store_id == store_id)
+    if start_date:
+        query = query.filter(model.date_created >= local_day_range(start_date)[0])
+    if end_date:
+        query = query.filter(model.date_created < local_day_range(end_date)[1])
+    if attendant:
+        query = query.filter(model.attendant == attendant)
+    if customer:
+        query = query.filter(model.customer_name.ilike(f"%{customer}%"))
+    return query
+
+
+def filtered_receipt_queries(store_id, start_date=None, end_date=None, attendant=None, customer=None):
+    """Filtered receipt queries over the hot table and, if the range reaches it, the store's archive"""
+    start = local_day_range(start_date)[0] if start_date else None
+    return [
+        filter_receipts(model.query, store_id, start_date, end_date, attendant, customer, model=model)
+        for model, _ in archive.receipt_sources(store_id, start)
+    ]
+
+
+def receipt_day(receipt):
+    """The local calendar day a receipt is reported under"""
+    return local_day(receipt.date_created)
+
+
+def sales_by_day(store_id, start_date, end_date):
+    """Sum and count a store's receipts per day over [start_date, end_date].
+
+    Reads the daily rollup, so the cost grows with the number of days rather
+    than the number of receipts or stores. Returns a dict of
+    {date: {'total': float, 'receipts_count': int, 'items_quantity': int}}
+    with only the days that have receipts.
+    """
+    rows = db.session.query(
+        DailySalesRollup.day,
+        func.sum(DailySalesRollup.total_amount),
+        func.sum(DailySalesRollup.receipts_count),
+        func.sum(DailySalesRollup.items_quantity)
+    ).filter(
+        DailySalesRollup.store_id == store_id,
+        DailySalesRollup.day >= start_date,
+        DailySalesRollup.day <= end_date
+    ).group_by(DailySalesRollup.day).all()
+    
+    return {
+        day: {
+            'total': float(total or 0),
+            'receipts_count': int(count or 0),
+            'items_quantity': int(quantity or 0)
+        }
+        for day, total, count, quantity in rows
+    }
+
+
+def _apply_rollup_delta(store_id, day, attendant, total_amount, receipts_count, items_quantity):
+    """Add a delta to one rollup row, creating the row if needed"""
+    values = {
+        'store_id': store_id,
+        'day': day,
+        'attendant': attendant,
+        'total_amount': total_amount,
+        'receipts_count': receipts_count,
+        'items_quantity': items_quantity
+    }
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect in ('sqlite', 'postgresql'):
+        # Atomic upsert so concurrent writers never lose an increment or race
+        # each other creating the row for a new day
+        insert = upsert_insert(dialect)
+        stmt = insert(DailySalesRollup).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['store_id', 'day', 'attendant'],
+            set_={
+                'total_amount': DailySalesRollup.total_amount + stmt.excluded.total_amount,
+                'receipts_count': DailySalesRollup.receipts_count + stmt.excluded.receipts_count,
+                'items_quantity': DailySalesRollup.items_quantity + stmt.excluded.items_quantity
+            }
+        )
+        db.session.execute(stmt)
+        return
+    
+    row = db.session.get(DailySalesRollup, (store_id, day, attendant))
+    if row is None:
+        db.session.add(DailySalesRollup(**values))
+    else:
+        row.total_amount = DailySalesRollup.total_amount + total_amount
+        row.receipts_count = DailySalesRollup.receipts_count + receipts_count
+        row.items_quantity = DailySalesRollup.items_quantity + items_quantity
+
+
+def record_receipt(receipt, sign=1):
+    """Add (sign=1) or remove (sign=-1) a receipt from the daily rollup.
+
+    Runs inside the caller's transaction; the receipt must have been flushed
+    so that date_created is set.
+    """
+    day = receipt_day(receipt)
+    _apply_rollup_delta(
+        receipt.store_id,
+        day,
+        receipt.attendant,
+        sign * (receipt.total_amount or 0),
+        sign,
+        sign * sum(item.quantity for item in receipt.items)
+    )
+    if sign < 0:
+        DailySalesRollup.query.filter(
+            DailySalesRollup.store_id == receipt.store_id,
+            DailySalesRollup.day == day,
+            DailySalesRollup.attendant == receipt.attendant,
+            DailySalesRollup.receipts_count <= 0
+        ).delete(synchronize_session=False)
+
+
+def rebuild_rollup(start_date=None, end_date=None):
+    """Recompute the rollup from the receipt tables, optionally for a local date range only.
+
+    Receipts (archived ones included) are streamed in batches and bucketed by
+    local day in Python so the bucketing matches receipt_day() on every
+    database. Returns the number of rollup rows written. The caller commits.
+    """
+    rollup = DailySalesRollup.query
+    if start_date:
+        rollup = rollup.filter(DailySalesRollup.day >= start_date)
+    if end_date:
+        rollup = rollup.filter(DailySalesRollup.day <= end_date)
+    rollup.delete(synchronize_session=False)
+    
+    buckets = {}
+    start = local_day_range(start_date)[0] if start_date else None
+    for receipt_model, item_model in archive.receipt_sources(None, start):
+        item_quantities = db.session.query(
+            item_model.receipt_id,
+            func.sum(item_model.quantity).label('quantity')
+        ).group_by(item_model.receipt_id).subquery()
+        receipts = db.session.query(
+            receipt_model.store_id,
+            receipt_model.date_created,
+            receipt_model.attendant,
+            receipt_model.total_amount,
+            func.coalesce(item_quantities.c.quantity, 0)
+        ).outerjoin(item_quantities, item_quantities.c.receipt_id == receipt_model.id)
+        receipts = filter_receipts(receipts, None, start_date, end_date, model=receipt_model)
+        
+        for store_id, created, attendant, total, quantity in receipts.yield_per(REBUILD_BATCH_SIZE):
+            bucket = buckets.setdefault((store_id, local_day(created), attendant), [0, 0, 0])
+            bucket[0] += total or 0
+            bucket[1] += 1
+            bucket[2] += int(quantity)
+    
+    rows = [
+        {
+            'store_id': store_id,
+            'day': day,
+            'attendant': attendant,
+            'total_amount': total,
+            'receipts_count': count,
+            'items_quantity': quantity
+        }
+        for (store_id, day, attendant), (total, count, quantity) in buckets.items()
+    ]
+    if rows:
+        db.session.execute(DailySalesRollup.__table__.insert(), rows)
+    return len(rows)
+
+
+def daily_series(store_id, start_date, end_date, buckets=None):
+    """One entry per day over [start_date, end_date], with zeroes for days without sales"""
+    if buckets is None:
+        buckets = sales_by_day(store_id, start_date, end_date)
+    
+    series = []
+    current_date = start_date
+    while current_date <= end_date:
+        bucket = buckets.get(current_date, {'total': 0.0, 'receipts_count': 0})
+        series.append({
+            'date': current_date.strftime('%Y-%m-%d'),
+            'day_name': current_date.strftime('%A'),
+            'day_short': current_date.strftime('%a'),
+            'day_month': current_date.strftime('%d'),
+            'total': bucket['total'],
+            'receipts_count': bucket['receipts_count']
+        })
+        current_date += timedelta(days=1)
+    return series
+
+
+def sum_range(buckets, start_date, end_date):
+    """Total sales of the buckets falling within [start_date, end_date]"""
+    return sum(b['total'] for day, b in buckets.items() if start_date <= day <= end_date)
+
+
+def dashboard_summary(store_id, today, chart_days=7):
+    """Today/yesterday/week/month totals and the recent daily chart from a single query"""
+    yesterday = today - timedelta(days=1)
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    chart_start = today - timedelta(days=chart_days - 1)
+    
+    # One range covering every figure on the dashboard
+    buckets = sales_by_day(store_id, min(yesterday, week_start, month_start, chart_start), today)
+    
+    return {
+        'today_sales': sum_range(buckets, today, today),
+        'yesterday_sales': sum_range(buckets, yesterday, yesterday),
+        'week_sales': sum_range(buckets, week_start, today),
+        'month_sales': sum_range(buckets, month_start, today),
+        'daily_sales': daily_series(store_id, chart_start, today, buckets)
+    }
+
+
+def item_sales(store_id, start_date, end_date, attendant=None):
+    """Per-item totals of a store over local days [start_date, end_date], grouped by the database.
+
+    Items are grouped by description: the catalog item's name, or the text
+    of a custom item, so a custom item typed with a catalog item's name is
+    the same item. Returns dicts with quantity, revenue (total_amount),
+    min/max/average unit price and the number of receipts the item appeared
+    on, most sold first. The average is weighted by quantity, so it
+    reflects what was actually charged when the same item sold at different
+    prices. Archived receipts are only queried when the range reaches back
+    into the archive.
+    """
+    start, end = local_day_range(start_date, end_date)
+    groups = []
+    for receipt_model, item_model in archive.receipt_sources(store_id, start):
+        description = func.coalesce(CatalogItem.name, item_model.custom_description)
+        query = db.session.query(
+            description,
+            func.sum(item_model.quantity),
+            func.sum(item_model.subtotal),
+            func.min(item_model.price),
+            func.max(item_model.price),
+            # Over the merged description, so a receipt with both a catalog
+            # line and a custom line of the same item counts once
+            func.count(func.distinct(item_model.receipt_id))
+        ).join(receipt_model, receipt_model.id == item_model.receipt_id).outerjoin(
+            CatalogItem, CatalogItem.id == item_model.catalog_item_id
+        ).filter(
+            receipt_model.store_id == store_id,
+            receipt_model.date_created >= start,
+            receipt_model.date_created < end
+        )
+        if attendant:
+            query = query.filter(receipt_model.attendant == attendant)
+        groups.extend(query.group_by(description))
+    
+    # Hot and archived receipts are disjoint, so their groups simply add up
+    totals = {}
+    for description, qty, revenue, min_price, max_price, receipts_count in groups:
+        entry = totals.get(description)
+        if entry is None:
+            totals[description] = [int(qty or 0), float(revenue or 0), float(min_price or 0),
+                                   float(max_price or 0), receipts_count]
+        else:
+            entry[0] += int(qty or 0)
+            entry[1] += float(revenue or 0)
+            entry[2] = min(entry[2], float(min_price or 0))
+            entry[3] = max(entry[3], float(max_price or 0))
+            entry[4] += receipts_count
+    
+    items = []
+    for description, (qty, revenue, min_price, max_price, receipts_count) in totals.items():
+        avg_price = revenue / qty if qty else 0.0
+        items.append({
+            'description': description,
+            'quantity': qty,
+            'total_amount': revenue,
+            'min_price': min_price,
+            'max_price': max_price,
+            'avg_price': avg_price,
+            # Kept for templates that show a single unit price
+            'price': avg_price,
+            'receipts_count': receipts_count
+        })
+    items.sort(key=lambda item: item['quantity'], reverse=True)
+    return items
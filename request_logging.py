@@ -0,0 +1,215 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+# Incoming X-Request-ID values are reused only if they look like an ID
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+_REQUEST_FIELDS = ('request_id', 'endpoint', 'method', 'path')
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with the request fields and any extra={...} values"""
+    
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in _REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in _REQUEST_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain lines for reading logs by hand (LOG_FORMAT=text)"""
+    
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+    
+    def format(self, record):
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = '-'
+        return super().format(record)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tag records with the current request and drop debug records from unsampled requests.
+    
+    Runs in the thread that logs, where the request context is available.
+    """
+    
+    def __init__(self, debug_enabled):
+        super().__init__()
+        self.debug_enabled = debug_enabled
+    
+    def filter(self, record):
+        if not has_request_context():
+            return record.levelno >= logging.INFO or self.debug_enabled
+        record.request_id = g.get('request_id')
+        record.endpoint = request.endpoint
+        record.method = request.method
+        record.path = request.path
+        return record.levelno >= logging.INFO or self.debug_enabled or g.get('log_debug', False)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """QueueHandler that hands records over unformatted and never blocks.
+    
+    The stock handler formats every record before queueing it so it can be
+    pickled to another process; this queue stays in-process, so formatting
+    (and the traceback text of exceptions) is left to the listener thread.
+    Log calls should therefore pass arguments that are not changed later.
+    When the queue is full the record is dropped and counted.
+    """
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record):
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Routes every log record through a queue to a writer thread.
+    
+    Request threads only build the record and queue it; the listener thread
+    formats it and writes it to stderr. Debug output is off unless LOG_LEVEL
+    is DEBUG, or a request is picked by the per-route debug sampling.
+    """
+    
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self.sample_rates = {}
+        self.default_sample_rate = 0.0
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        level = logging.getLevelName(app.config['LOG_LEVEL'].upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown LOG_LEVEL {app.config['LOG_LEVEL']!r}")
+        self.default_sample_rate = app.config['LOG_DEBUG_SAMPLE_RATE']
+        self.sample_rates = parse_sample_rates(app.config['LOG_DEBUG_SAMPLE_ROUTES'])
+        sampling = self.default_sample_rate > 0 or any(rate > 0 for rate in self.sample_rates.values())
+        
+        output = logging.StreamHandler(sys.stderr)
+        if app.config['LOG_FORMAT'] == 'text':
+            output.setFormatter(TextFormatter())
+        else:
+            output.setFormatter(JSONFormatter())
+        handler = BackgroundQueueHandler(queue.Queue(app.config['LOG_QUEUE_SIZE']))
+        handler.addFilter(RequestContextFilter(debug_enabled=level <= logging.DEBUG))
+        
+        with self._lock:
+            # Replace the pipeline of an earlier create_app() in this process
+            root = logging.getLogger()
+            if self.handler is not None:
+                root.removeHandler(self.handler)
+                self.listener.stop()
+            self.handler = handler
+            self.listener = QueueListener(handler.queue, output)
+            root.addHandler(handler)
+            root.setLevel(level)
+            self.listener.start()
+        
+        # Flask's own handler writes to stderr in the request thread
+        app.logger.removeHandler(default_handler)
+        # Sampled requests need the app's debug records; other loggers stay at LOG_LEVEL
+        app.logger.setLevel(logging.DEBUG if sampling else level)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+    
+    def _start_request(self):
+        request_id = request.headers.get('X-Request-ID', '')
+        g.request_id = request_id if REQUEST_ID_PATTERN.match(request_id) else uuid.uuid4().hex
+        rate = self.sample_rates.get(request.endpoint, self.default_sample_rate)
+        g.log_debug = rate > 0 and random.random() < rate
+    
+    def _finish_request(self, response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
+    
+    def restart_listener(self):
+        """Start a writer thread in a forked child, which does not inherit the parent's.
+        
+        The child gets a fresh queue: the parent's queue lock may have been
+        held by its writer thread at the moment of the fork.
+        """
+        self._lock = threading.Lock()
+        if self.listener is not None:
+            self.handler.queue = self.listener.queue = queue.Queue(self.handler.queue.maxsize)
+            self.listener._thread = None
+            self.listener.start()
+    
+    def stop(self):
+        """Write out the queued records and stop the writer thread"""
+        with self._lock:
+            if self.listener is not None and self.listener._thread is not None:
+                self.listener.stop()
+    
+    def render(self):
+        """The dropped-record counter in the Prometheus text exposition format"""
+        dropped = self.handler.dropped if self.handler else 0
+        return ('# HELP receipts_log_records_dropped_total Log records dropped because the log queue was full\n'
+                '# TYPE receipts_log_records_dropped_total counter\n'
+                f'receipts_log_records_dropped_total {dropped}\n')
+
+
+def parse_sample_rates(value):
+    """Parse 'receipts.generate_receipt=0.1,api.search_api=1' into {endpoint: rate}"""
+    rates = {}
+    for part in (value or '').split(','):
+        if not part.strip():
+            continue
+        endpoint, _, rate = part.partition('=')
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+pipeline = LogPipeline()
+
+
+def init_app(app):
+    """Send the app's logging through the background pipeline"""
+    pipeline.init_app(app)
+
+
+atexit.register(pipeline.stop)
+os.register_at_fork(after_in_child=pipeline.restart_listener)
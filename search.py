@@ -0,0 +1,156 @@
+import re
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import selectinload
+
+from models import db, Receipt, ReceiptItem, ArchivedReceipt, CatalogItem
+
+SEARCH_TABLE = 'receipt_search'
+
+# SQLite: an FTS5 table whose rowid is the receipt id. The store column holds
+# one token per receipt (see _store_token) that every query must match, so a
+# search only ranks the matches of its own store.
+# PostgreSQL: a tsvector per receipt with a GIN index, plus the store id.
+# Entries stay when a receipt is archived (ids are kept), so search covers both.
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        receipt_number, customer_name, customer_address, items, store,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+POSTGRESQL_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        receipt_id INTEGER PRIMARY KEY,
+        store_id INTEGER NOT NULL,
+        document TSVECTOR NOT NULL
+    )""",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+]
+DROP_DDL = [f"DROP TABLE IF EXISTS {SEARCH_TABLE}"]
+
+
+def _dialect(bind=None):
+    return (bind or db.session.get_bind()).dialect.name
+
+
+def ddl_for(dialect):
+    """Statements creating the search index for a dialect; empty when it has no full-text support"""
+    return {'sqlite': SQLITE_DDL, 'postgresql': POSTGRESQL_DDL}.get(dialect, [])
+
+
+def create_index(bind=None):
+    bind = bind or db.engine
+    with bind.begin() as conn:
+        for statement in ddl_for(bind.dialect.name):
+            conn.execute(text(statement))
+
+
+def _store_token(store_id):
+    return f's{store_id}'
+
+
+def _document(receipt):
+    return {
+        'receipt_id': receipt.id,
+        'store_id': receipt.store_id,
+        'store': _store_token(receipt.store_id),
+        'receipt_number': receipt.receipt_number or '',
+        'customer_name': receipt.customer_name or '',
+        'customer_address': receipt.customer_address or '',
+        'items': ' '.join(item.description for item in receipt.items),
+    }
+
+
+def index_receipt(receipt):
+    """Add a flushed receipt to the search index inside the caller's transaction"""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, receipt_number, customer_name, customer_address, items, store) "
+            "VALUES (:receipt_id, :receipt_number, :customer_name, :customer_address, :items, :store)"
+        ), _document(receipt))
+    elif dialect == 'postgresql':
+        db.session.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (receipt_id, store_id, document) VALUES (:receipt_id, :store_id, "
+            "setweight(to_tsvector('simple', :receipt_number), 'A') || "
+            "setweight(to_tsvector('simple', :customer_name), 'A') || "
+            "setweight(to_tsvector('simple', :items), 'B') || "
+            "setweight(to_tsvector('simple', :customer_address), 'C'))"
+        ), _document(receipt))
+
+
+def unindex_receipt(receipt_id):
+    """Remove a receipt from the search index inside the caller's transaction"""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {'id': receipt_id})
+    elif dialect == 'postgresql':
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE receipt_id = :id"), {'id': receipt_id})
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every receipt; returns how many were indexed. The caller commits."""
+    db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    count = 0
+    for model in (Receipt, ArchivedReceipt):
+        receipts = model.query.options(selectinload(model.items)).order_by(model.id).yield_per(batch_size)
+        for receipt in receipts:
+            index_receipt(receipt)
+            count += 1
+    return count
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search_receipts(store_id, query, page=1, per_page=20):
+    """A store's ranked receipts matching every word of the query (as a prefix), with items loaded.
+
+    Returns (receipts, has_next).
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], False
+    offset = (page - 1) * per_page
+    params = {'limit': per_page + 1, 'offset': offset, 'store_id': store_id}
+    dialect = _dialect()
+    
+    if dialect == 'sqlite':
+        # Quote each word so user input cannot inject FTS5 query syntax
+        params['match'] = f'store : "{_store_token(store_id)}" ' + ' '.join(f'"{term}"*' for term in terms)
+        rows = db.session.execute(text(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match "
+            f"ORDER BY bm25({SEARCH_TABLE}, 10.0, 10.0, 1.0, 5.0, 0.0) LIMIT :limit OFFSET :offset"
+        ), params).all()
+    elif dialect == 'postgresql':
+        params['tsquery'] = ' & '.join(f'{term}:*' for term in terms)
+        rows = db.session.execute(text(
+            f"SELECT receipt_id FROM {SEARCH_TABLE}, to_tsquery('simple', :tsquery) AS query "
+            "WHERE store_id = :store_id AND document @@ query ORDER BY ts_rank(document, query) DESC, receipt_id DESC "
+            "LIMIT :limit OFFSET :offset"
+        ), params).all()
+    else:
+        # No full-text support: fall back to a substring scan
+        like = f'%{query.strip()}%'
+        rows = db.session.query(Receipt.id).filter(Receipt.store_id == store_id, or_(
+            Receipt.receipt_number.ilike(like),
+            Receipt.customer_name.ilike(like),
+            Receipt.customer_address.ilike(like),
+            Receipt.items.any(or_(
+                ReceiptItem.custom_description.ilike(like),
+                ReceiptItem.catalog_item.has(CatalogItem.name.ilike(like))
+            ))
+        )).order_by(Receipt.date_created.desc()).limit(per_page + 1).offset(offset).all()
+    
+    ids = [row[0] for row in rows]
+    has_next = len(ids) > per_page
+    ids = ids[:per_page]
+    by_id = {}
+    for model in (Receipt, ArchivedReceipt):
+        missing = [receipt_id for receipt_id in ids if receipt_id not in by_id]
+        if not missing:
+            break
+        for receipt in model.query.options(selectinload(model.items)).filter(model.id.in_(missing)):
+            by_id[receipt.id] = receipt
+    return [by_id[receipt_id] for receipt_id in ids if receipt_id in by_id], has_next
@@ -0,0 +1,153 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+# Pragmas applied to every new connection in production mode. WAL lets
+# readers keep reading while one writer commits; synchronous=NORMAL is
+# durable across application crashes in WAL mode and only fsyncs on
+# checkpoint; busy_timeout makes writers wait for the lock instead of
+# failing at once.
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+SQLITE_CHECKPOINT_SECONDS = float(os.environ.get('SQLITE_CHECKPOINT_SECONDS', 60))
+
+LOCK_RETRY_ATTEMPTS = int(os.environ.get('SQLITE_LOCK_RETRIES', 5))
+LOCK_RETRY_DELAY = 0.05
+
+LOCK_ERRORS = ('database is locked', 'database table is locked', 'database schema is locked')
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+    f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}',
+    'PRAGMA temp_store=MEMORY',
+)
+
+
+def is_file_database(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') != 'sqlite:'
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _enabled(app):
+    return (app.config.get('SQLITE_PROFILE') == 'production'
+            and is_file_database(app.config['SQLALCHEMY_DATABASE_URI']))
+
+
+def configure_engine(app):
+    """Engine options of the production profile; must run before db.init_app().
+    
+    Does nothing unless SQLITE_PROFILE is 'production' and the database is
+    a SQLite file, as does init_app().
+    """
+    if not _enabled(app):
+        return
+    # The driver's own lock wait, in seconds, matches busy_timeout
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options.setdefault('connect_args', {})['timeout'] = SQLITE_BUSY_TIMEOUT_MS / 1000
+
+
+def init_app(app, db):
+    """Switch the app's SQLite file to the production profile; must run after db.init_app().
+    
+    Only the primary engine gets the pragmas; other binds, such as the
+    reporting database, keep their own settings.
+    """
+    if not _enabled(app):
+        return
+    with app.app_context():
+        event.listen(db.engine, 'connect', _apply_pragmas)
+    
+    if SQLITE_CHECKPOINT_SECONDS > 0:
+        # Started by each worker's first request: a thread started at import
+        # would stay behind in the master process under gunicorn --preload
+        app.before_request(Checkpointer(app, db, SQLITE_CHECKPOINT_SECONDS).start)
+
+
+class Checkpointer:
+    """Background thread that checkpoints the WAL file on a fixed interval.
+    
+    SQLite checkpoints automatically when a commit pushes the WAL past 1000
+    pages, but a long-running reader (a big export, a streamed print) makes
+    those checkpoints stop short and the WAL keeps growing. A PASSIVE
+    checkpoint never blocks readers or writers and catches up once they
+    finish.
+    """
+    
+    def __init__(self, app, db, interval):
+        self.app = app
+        self.db = db
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+    
+    def start(self):
+        # Called on every request; only the first one in a process does anything
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            # Threads do not survive a fork, so each worker runs its own
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='sqlite-checkpoint', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.checkpoint()
+            except Exception as e:
+                self.app.logger.warning("WAL checkpoint failed: %s", e)
+    
+    def checkpoint(self):
+        """Run one PASSIVE checkpoint; returns (busy, wal_pages, checkpointed_pages)"""
+        with self.app.app_context():
+            with self.db.engine.connect() as conn:
+                return tuple(conn.execute(text('PRAGMA wal_checkpoint(PASSIVE)')).one())
+
+
+def is_lock_error(exc):
+    """True for SQLite's transient lock errors, which succeed when retried"""
+    return isinstance(exc, OperationalError) and any(message in str(exc.orig) for message in LOCK_ERRORS)
+
+
+def retry_on_lock(work, before_retry=None, attempts=None, delay=LOCK_RETRY_DELAY):
+    """Call work() and retry it with jittered exponential backoff on lock errors.
+    
+    busy_timeout already waits for the lock, but SQLite reports some
+    conflicts immediately, e.g. when a transaction that started reading must
+    upgrade to a write after another connection committed. work must be a
+    whole transaction; before_retry (typically a session rollback) runs
+    before each new attempt. Other errors, and the last lock error, are
+    raised.
+    """
+    attempts = attempts or LOCK_RETRY_ATTEMPTS
+    for attempt in range(attempts):
+        try:
+            return work()
+        except OperationalError as e:
+            if not is_lock_error(e) or attempt == attempts - 1:
+                raise
+            if before_retry:
+                before_retry()
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
@@ -33,6 +33,15 @@ set FLASK_ENV=development
 set FLASK_DEBUG=1
 set SESSION_SECRET=your-secret-key-here
 
+REM Create the database if it doesn't exist, otherwise apply new migrations
+echo Initializing database...
+flask setup-db
+if %errorlevel% neq 0 (
+    echo Error: The database could not be set up
+    pause
+    exit /b 1
+)
+
 REM Start the application
 echo Starting Flask application...
 echo Open your browser and go to: http://localhost:5000
@@ -41,10 +41,16 @@ set FLASK_ENV=development
 set FLASK_DEBUG=1
 set SESSION_SECRET=local_development_secret_key_123
 
-REM Create database if it doesn't exist
+REM Create the database if it doesn't exist, otherwise apply new migrations
+REM (a database from before migrations is marked as the baseline first)
 echo.
 echo Initializing database...
-python -c "from app import app, db; app.app_context().push(); db.create_all(); print('Database initialized successfully!')"
+flask setup-db
+if errorlevel 1 (
+    echo ERROR: The database could not be set up
+    pause
+    exit /b 1
+)
 
 REM Start the Flask application
 echo.
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from cache import freeze
+from models import db, Store
+
+
+def load_stores():
+    """Every store as an immutable snapshot, keyed by code"""
+    return {store.code: freeze(store) for store in Store.query}
+
+
+def parse_store_hosts(value):
+    """Parse 'north.example.com=north,south.example.com=south' into {host: store code}"""
+    hosts = {}
+    for part in (value or '').split(','):
+        if not part.strip():
+            continue
+        host, _, code = part.partition('=')
+        hosts[host.strip().lower()] = code.strip()
+    return hosts
+
+
+def add_store(code, name):
+    """Create a store unless one with this code exists; returns it. The caller commits."""
+    store = Store.query.filter_by(code=code).first()
+    if store is None:
+        store = Store(code=code, name=name, created_at=datetime.utcnow())
+        db.session.add(store)
+        db.session.flush()
+    return store
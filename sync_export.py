@@ -0,0 +1,224 @@
+import csv
+import heapq
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import selectinload
+
+from models import db, Receipt, ArchivedReceipt, ReceiptTombstone
+
+SYNC_BATCH_SIZE = 500
+# Rows younger than this are left for the next sync, so a transaction that
+# took an id but has not committed yet is not skipped past by the cursor
+SETTLE_SECONDS = 5
+
+RECEIPT_COLUMNS = [
+    'receipt_id', 'store_id', 'receipt_number', 'date_created',
+    'business_name', 'business_email', 'contact_number', 'location', 'attendant',
+    'customer_name', 'customer_address', 'total_amount', 'money_received', 'change_amount',
+]
+ITEM_COLUMNS = ['item_id', 'item_description', 'item_quantity', 'item_price', 'item_subtotal']
+CSV_COLUMNS = ['op'] + RECEIPT_COLUMNS + ITEM_COLUMNS + ['deleted_at']
+
+
+def parse_cursor(cursor):
+    """'<receipt id>-<tombstone id>' -> (receipt id, tombstone id); empty means from the beginning"""
+    if not cursor:
+        return 0, 0
+    receipt_id, tombstone_id = cursor.split('-')
+    return int(receipt_id), int(tombstone_id)
+
+
+def format_cursor(receipt_id, tombstone_id):
+    return f'{receipt_id}-{tombstone_id}'
+
+
+def _upper_id(column, after, limit, extra_filters=()):
+    """Highest id within the next `limit` rows after `after` (or all of them)"""
+    query = db.session.query(column).filter(column > after, *extra_filters)
+    if limit:
+        row = query.order_by(column).offset(limit - 1).limit(1).first()
+        if row:
+            return row[0]
+    return query.with_entities(func.max(column)).scalar() or after
+
+
+def _settled_receipt_ids(store_id):
+    """Ids of a store's settled receipts in both the hot table and the archive, which the sync streams alike"""
+    settled = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    return union_all(*(
+        select(model.id.label('id')).where(model.store_id == store_id, model.date_created < settled)
+        for model in (Receipt, ArchivedReceipt)
+    )).subquery()
+
+
+def plan(store_id, cursor, limit=None):
+    """Work out the id ranges for a sync of one store starting at cursor.
+
+    Returns (receipt_range, tombstone_range, next_cursor, has_more); ranges
+    are half-open (after, upto]. The next cursor is known before anything is
+    streamed, so it can be sent as a response header. Receipt ids are never
+    reused (AUTOINCREMENT on SQLite, sequences elsewhere) and tombstones are
+    never deleted, so everything past the cursor is new. Archived receipts
+    keep their ids and are streamed too, so the receipt range covers both
+    tables.
+    """
+    last_receipt, last_tombstone = parse_cursor(cursor)
+    receipt_ids = _settled_receipt_ids(store_id).c.id
+    tombstones = [ReceiptTombstone.store_id == store_id]
+    upto_receipt = _upper_id(receipt_ids, last_receipt, limit)
+    upto_tombstone = _upper_id(ReceiptTombstone.id, last_tombstone, limit, tombstones)
+    
+    has_more = bool(limit) and (
+        db.session.query(receipt_ids).filter(receipt_ids > upto_receipt).first() is not None
+        or db.session.query(ReceiptTombstone.id).filter(ReceiptTombstone.id > upto_tombstone, *tombstones).first() is not None
+    )
+    return ((last_receipt, upto_receipt), (last_tombstone, upto_tombstone),
+            format_cursor(upto_receipt, upto_tombstone), has_more)
+
+
+def _receipts(store_id, after, upto):
+    """A store's receipts with after < id <= upto: one iterator for the hot table and, if it holds any, one for the archive"""
+    models = [Receipt]
+    newest_archived = db.session.query(func.max(ArchivedReceipt.id)).filter(ArchivedReceipt.store_id == store_id).scalar()
+    if after < (newest_archived or 0):
+        models.append(ArchivedReceipt)
+    return [model.query.options(selectinload(model.items))
+            .filter(model.store_id == store_id, model.id > after, model.id <= upto)
+            .order_by(model.id)
+            .yield_per(SYNC_BATCH_SIZE)
+            for model in models]
+
+
+def _tombstones(store_id, after, upto):
+    return (ReceiptTombstone.query
+            .filter(ReceiptTombstone.store_id == store_id, ReceiptTombstone.id > after, ReceiptTombstone.id <= upto)
+            .order_by(ReceiptTombstone.id)
+            .yield_per(SYNC_BATCH_SIZE))
+
+
+def _changed_at(row):
+    if isinstance(row, ReceiptTombstone):
+        return row.deleted_at or datetime.min
+    return row.date_created or datetime.min
+
+
+def _changes(store_id, receipt_range, tombstone_range):
+    """Receipts and tombstones of the ranges merged in the order they were written.
+    
+    A client that applies the changes one by one then ends up in the same
+    state as the server, whatever the changes touch.
+    """
+    return heapq.merge(*_receipts(store_id, *receipt_range), _tombstones(store_id, *tombstone_range), key=_changed_at)
+
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat() + 'Z'
+    return str(value)
+
+
+def _receipt_fields(receipt):
+    return {
+        'receipt_id': receipt.id,
+        'store_id': receipt.store_id,
+        'receipt_number': receipt.receipt_number,
+        'date_created': _text(receipt.date_created),
+        'business_name': receipt.business_name,
+        'business_email': receipt.business_email,
+        'contact_number': receipt.contact_number,
+        'location': receipt.location,
+        'attendant': receipt.attendant,
+        'customer_name': receipt.customer_name,
+        'customer_address': receipt.customer_address,
+        'total_amount': _text(receipt.total_amount),
+        'money_received': _text(receipt.money_received),
+        'change_amount': _text(receipt.change_amount),
+    }
+
+
+def _item_fields(item):
+    return {
+        'item_id': item.id,
+        'item_description': item.description,
+        'item_quantity': item.quantity,
+        'item_price': _text(item.price),
+        'item_subtotal': _text(item.subtotal),
+    }
+
+
+def _tombstone_fields(tombstone):
+    return {
+        'receipt_id': tombstone.receipt_id,
+        'store_id': tombstone.store_id,
+        'receipt_number': tombstone.receipt_number,
+        'deleted_at': _text(tombstone.deleted_at),
+    }
+
+
+def ndjson_lines(store_id, receipt_range, tombstone_range):
+    """One JSON object per receipt (with its items) and per deletion, in the order they happened"""
+    for row in _changes(store_id, receipt_range, tombstone_range):
+        if isinstance(row, ReceiptTombstone):
+            yield json.dumps({'op': 'delete', **_tombstone_fields(row)}) + '\n'
+            continue
+        record = {'op': 'upsert', **_receipt_fields(row)}
+        record['items'] = [_item_fields(item) for item in row.items]
+        yield json.dumps(record) + '\n'
+
+
+def csv_lines(store_id, receipt_range, tombstone_range):
+    """One CSV row per line item (receipt columns repeated) and per deletion, in the order they happened"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    
+    writer.writeheader()
+    yield flush()
+    for row in _changes(store_id, receipt_range, tombstone_range):
+        if isinstance(row, ReceiptTombstone):
+            writer.writerow({'op': 'delete', **_tombstone_fields(row)})
+        else:
+            fields = {'op': 'upsert', **_receipt_fields(row)}
+            for item in row.items or [None]:
+                writer.writerow({**fields, **(_item_fields(item) if item else {})})
+        yield flush()
+
+
+def gzipped(chunks, flush_bytes=64 * 1024):
+    """Gzip a stream of text chunks, emitting compressed data every flush_bytes of input"""
+    compressor = zlib.compressobj(wbits=31)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_bytes:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def encoded(chunks, chunk_bytes=64 * 1024):
+    """UTF-8 encode a stream of text chunks, coalesced into blocks of about chunk_bytes"""
+    parts, size = [], 0
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= chunk_bytes:
+            yield ''.join(parts).encode('utf-8')
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
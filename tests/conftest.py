@@ -0,0 +1,52 @@
+import pytest
+
+import metrics
+import reporting
+from app import create_app
+from commands import create_schema
+from models import db, receipt_numbers, Receipt, ReceiptItem
+
+STORE_ID = 1
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh SQLite file with the full schema and the default store"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'receipts.db'}",
+        'JOB_ARTIFACTS_DIR': str(tmp_path / 'artifacts'),
+    })
+    # Request metrics and reserved receipt numbers are per process; each
+    # test starts from none
+    metrics.reset()
+    receipt_numbers.reset()
+    with app.app_context():
+        create_schema()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def build_receipt():
+    """Factory for unsaved receipts of the default store with one custom line item"""
+    def build(amount=10, quantity=1, **columns):
+        columns.setdefault('attendant', 'Ann')
+        receipt = Receipt(store_id=STORE_ID, business_name='B', contact_number='1', location='L',
+                          total_amount=amount, money_received=amount, change_amount=0, **columns)
+        receipt.items.append(ReceiptItem(custom_description='Repair', quantity=quantity, price=amount, subtotal=amount))
+        return receipt
+    return build
+
+
+@pytest.fixture
+def add_receipt(app, build_receipt):
+    """Factory that saves a receipt, with its daily rollup entry, and returns it"""
+    def add(**kwargs):
+        receipt = build_receipt(**kwargs)
+        db.session.add(receipt)
+        db.session.flush()
+        reporting.record_receipt(receipt)
+        db.session.commit()
+        return receipt
+    return add
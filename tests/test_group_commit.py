@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from group_commit import GroupCommitWriter
+from models import db, Receipt
+
+
+def submit_together(writer, receipts):
+    """Submit receipts from one thread each; returns each one's result or exception"""
+    outcomes = [None] * len(receipts)
+    
+    def submit(i):
+        try:
+            outcomes[i] = writer.submit(receipts[i])
+        except Exception as e:
+            outcomes[i] = e
+    
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(receipts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_one_bad_receipt_does_not_fail_its_batch(app, build_receipt):
+    writer = GroupCommitWriter(app, max_delay=0.2)
+    # The bad receipt breaks a NOT NULL constraint, so the batch write fails
+    receipts = [build_receipt(), build_receipt(quantity=None), build_receipt()]
+    outcomes = submit_together(writer, receipts)
+    
+    assert isinstance(outcomes[1], Exception)
+    assert outcomes[0].id and outcomes[2].id
+    numbers = {number for number, in db.session.query(Receipt.receipt_number)}
+    assert numbers == {receipts[0].receipt_number, receipts[2].receipt_number}
+
+
+def test_timed_out_receipt_is_not_written(app, build_receipt):
+    # The writer holds the receipt longer than submit() waits for it
+    writer = GroupCommitWriter(app, max_delay=0.3, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        writer.submit(build_receipt())
+    
+    writer.timeout = 30
+    written = writer.submit(build_receipt())
+    assert [number for number, in db.session.query(Receipt.receipt_number)] == [written.receipt_number]
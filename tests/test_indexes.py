@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import reporting
+from conftest import STORE_ID
+from models import db, Receipt
+
+
+@pytest.fixture
+def receipts(add_receipt):
+    for i in range(40):
+        add_receipt(attendant='Ann' if i % 2 else 'Bob', date_created=datetime(2026, 1, 1) + timedelta(hours=i * 7))
+
+
+def query_plans(work):
+    """Run work() and return the EXPLAIN QUERY PLAN text of every SELECT it executed"""
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        work()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    
+    plans = []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+            plans.append('\n'.join(row[-1] for row in rows))
+    return plans
+
+
+def test_date_range_uses_store_date_index(receipts):
+    query = reporting.filter_receipts(Receipt.query, STORE_ID, date(2026, 1, 3), date(2026, 1, 5))
+    plan, = query_plans(query.all)
+    assert 'ix_receipt_store_date_created' in plan
+    assert 'SCAN receipt' not in plan
+
+
+def test_attendant_range_uses_store_attendant_date_index(receipts):
+    query = reporting.filter_receipts(Receipt.query, STORE_ID, date(2026, 1, 3), date(2026, 1, 5), attendant='Ann')
+    plan, = query_plans(query.all)
+    assert 'ix_receipt_store_attendant_date_created' in plan
+    assert 'SCAN receipt' not in plan
+
+
+def test_items_by_receipt_use_receipt_id_index(receipts):
+    plans = query_plans(lambda: reporting.item_sales(STORE_ID, date(2026, 1, 3), date(2026, 1, 5)))
+    plan, = [plan for plan in plans if 'archived_receipt' not in plan and 'receipt_item' in plan]
+    # Receipts are found by store and date, then their items by receipt id
+    assert 'ix_receipt_store_date_created' in plan
+    assert 'ix_receipt_item_receipt_id' in plan
+    assert 'SCAN receipt_item' not in plan
@@ -0,0 +1,30 @@
+import time
+
+import exports
+import jobs
+from extensions import job_runner
+from models import db, Job
+
+
+def wait_for(job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        job = db.session.get(Job, job_id)
+        if job.status in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_export_longer_than_a_progress_interval_finishes(app, build_receipt, monkeypatch):
+    # Every progress call writes, while the export still streams receipts
+    monkeypatch.setattr(jobs, 'PROGRESS_INTERVAL', 0)
+    db.session.add_all(build_receipt() for _ in range(3 * exports.PROGRESS_EVERY))
+    db.session.commit()
+    
+    job = job_runner.submit('receipts_excel', {'store_id': 1, 'start_date': None, 'end_date': None,
+                                               'attendant': None, 'customer': None})
+    job = wait_for(job.id)
+    assert job.status == 'done', job.error
+    assert job.progress == 1.0
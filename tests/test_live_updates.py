@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import archive
+import live_updates
+from extensions import live_broker
+from models import db, ArchivedReceipt, ReceiptTombstone
+
+
+def test_totals_count_each_receipt_once_whatever_the_commit_order(add_receipt):
+    loaded = add_receipt(id=5, amount=10)
+    totals = live_updates.StoreTotals(1)
+    # Took its id before the loaded receipt but committed after the load
+    late = add_receipt(id=3, amount=7)
+    
+    assert not totals.apply(live_updates.receipt_added(loaded))
+    assert totals.apply(live_updates.receipt_added(late))
+    assert not totals.apply(live_updates.receipt_added(late))
+    assert totals.as_dict()['today_sales'] == 17
+    assert totals.as_dict()['today_receipts'] == 2
+    assert totals.as_dict()['total_receipts'] == 2
+    
+    tombstone = ReceiptTombstone(receipt_id=late.id, store_id=1, receipt_number=late.receipt_number)
+    db.session.add(tombstone)
+    db.session.flush()
+    deleted = live_updates.receipt_deleted(late, tombstone)
+    assert totals.apply(deleted)
+    assert not totals.apply(deleted)
+    assert totals.as_dict()['today_sales'] == 10
+    assert totals.as_dict()['total_receipts'] == 1
+
+
+def test_total_receipts_includes_archived_receipts(add_receipt):
+    old_id = add_receipt(date_created=datetime.utcnow() - timedelta(days=400)).id
+    add_receipt()
+    archive.archive_receipts(older_than_days=365)
+    totals = live_updates.StoreTotals(1)
+    assert totals.as_dict()['total_receipts'] == 2
+    
+    archived = db.session.get(ArchivedReceipt, old_id)
+    tombstone = ReceiptTombstone(receipt_id=archived.id, store_id=1, receipt_number=archived.receipt_number)
+    db.session.add(tombstone)
+    db.session.flush()
+    assert totals.apply(live_updates.receipt_deleted(archived, tombstone))
+    assert totals.as_dict()['total_receipts'] == 1
+
+
+def test_dashboards_over_the_stream_limit_are_asked_to_come_back(app):
+    app.config['LIVE_MAX_STREAMS'] = 1
+    subscription, _ = live_broker.subscribe(1, max_streams=1)
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['admin_logged_in'] = True
+        response = client.get('/admin/live')
+        body = response.get_data(as_text=True)
+        response.close()
+    finally:
+        live_broker.unsubscribe(subscription)
+    assert response.status_code == 200
+    assert body.startswith('retry: 30000\n\n')
+    assert 'event: busy' in body
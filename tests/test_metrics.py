@@ -0,0 +1,22 @@
+from jinja2 import DictLoader
+from sqlalchemy import event
+
+import metrics
+from models import db
+
+
+def test_streamed_body_queries_are_recorded_when_it_closes(app, add_receipt):
+    receipt = add_receipt()
+    app.jinja_loader = DictLoader({'print_all_receipts.html': '{% for r in receipts %}{{ r.receipt_number }}{% endfor %}'})
+    
+    statements = []
+    event.listen(db.engine, 'after_cursor_execute', lambda *args: statements.append(args[2]))
+    response = app.test_client().get('/print_all_receipts')
+    assert receipt.receipt_number in response.get_data(as_text=True)
+    response.close()
+    
+    # The receipts are read while the body streams, after the view returned,
+    # and still count towards the request
+    counts, query_count, requests = metrics.request_queries._series['receipts.print_all_receipts']
+    assert requests == 1
+    assert query_count == len(statements)
@@ -0,0 +1,13 @@
+from models import db
+
+
+def test_ids_of_deleted_receipts_are_not_reused(add_receipt):
+    first = add_receipt()
+    first_id, first_item_id = first.id, first.items[0].id
+    # Empties the hot tables, as deleting or archiving the newest receipt can
+    db.session.delete(first)
+    db.session.commit()
+    
+    second = add_receipt()
+    assert second.id > first_id
+    assert second.items[0].id > first_item_id
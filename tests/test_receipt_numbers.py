@@ -0,0 +1,60 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from models import db, ReceiptNumberAllocator
+
+NUMBERS_PER_WORKER = 40
+
+
+def take_numbers(app, allocator, count):
+    with app.app_context():
+        return [allocator.next_number() for _ in range(count)]
+
+
+def test_threads_get_unique_numbers(app):
+    # A small block makes the threads reserve new blocks concurrently
+    allocator = ReceiptNumberAllocator(block_size=3)
+    results = []
+    
+    def worker():
+        results.extend(take_numbers(app, allocator, NUMBERS_PER_WORKER))
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(results) == 8 * NUMBERS_PER_WORKER
+    assert len(set(results)) == len(results)
+
+
+def _forked_worker(app, allocator, results):
+    # Connections must not be shared with the parent
+    with app.app_context():
+        db.engine.dispose(close=False)
+    results.put(take_numbers(app, allocator, NUMBERS_PER_WORKER))
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+def test_forked_processes_get_unique_numbers(app):
+    allocator = ReceiptNumberAllocator(block_size=5)
+    # The children inherit a partly used block, which they must not serve from
+    numbers = [allocator.next_number()]
+    
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=_forked_worker, args=(app, allocator, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        numbers.extend(results.get(timeout=30))
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    numbers.extend(take_numbers(app, allocator, NUMBERS_PER_WORKER))
+    
+    assert len(numbers) == 1 + 5 * NUMBERS_PER_WORKER
+    assert len(set(numbers)) == len(numbers)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import catalog
+import reporting
+from conftest import STORE_ID
+from localtime import local_today
+from models import db, ReceiptItem
+
+
+def test_item_sales_counts_a_receipt_with_catalog_and_custom_lines_once(app, build_receipt):
+    catalog_id = catalog.add_items({'Repair': 10})['Repair']
+    # build_receipt's line is a custom 'Repair'; add the catalog one next to it
+    receipt = build_receipt(date_created=datetime.utcnow())
+    receipt.items.append(ReceiptItem(catalog_item_id=catalog_id, quantity=2, price=10, subtotal=20))
+    db.session.add(receipt)
+    db.session.add(build_receipt(date_created=datetime.utcnow()))
+    db.session.commit()
+    
+    item, = reporting.item_sales(STORE_ID, local_today(), local_today())
+    assert item['description'] == 'Repair'
+    assert item['quantity'] == 4
+    assert item['total_amount'] == 40
+    assert item['receipts_count'] == 2
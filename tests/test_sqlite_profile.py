@@ -0,0 +1,41 @@
+import threading
+
+from sqlalchemy import text
+
+from app import create_app
+from models import db
+import replica
+
+
+def checkpoint_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'sqlite-checkpoint']
+
+
+def test_production_profile_only_changes_the_primary(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLITE_PROFILE': 'production',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'REPORTING_DATABASE_URL': f"sqlite:///{tmp_path / 'reporting.db'}",
+    })
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        with db.engines[replica.REPORTING_BIND].connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
+
+
+def test_checkpointer_starts_with_the_first_request(tmp_path):
+    before = len(checkpoint_threads())
+    app = create_app({
+        'TESTING': True,
+        'SQLITE_PROFILE': 'production',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+    })
+    # Nothing runs at import time, so a preloading master forks no stale thread
+    assert len(checkpoint_threads()) == before
+    
+    client = app.test_client()
+    client.get('/admin/metrics')
+    client.get('/admin/metrics')
+    assert len(checkpoint_threads()) == before + 1
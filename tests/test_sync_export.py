@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timedelta
+
+import archive
+import sync_export
+from conftest import STORE_ID
+from models import db
+
+
+def sync(cursor='', limit=None):
+    receipt_range, tombstone_range, next_cursor, has_more = sync_export.plan(STORE_ID, cursor, limit)
+    rows = [json.loads(line) for line in sync_export.ndjson_lines(STORE_ID, receipt_range, tombstone_range)]
+    return rows, next_cursor, has_more
+
+
+def add_receipts(build_receipt, count, days_ago):
+    receipts = [build_receipt(date_created=datetime.utcnow() - timedelta(days=days_ago, minutes=n))
+                for n in range(count)]
+    db.session.add_all(receipts)
+    db.session.commit()
+
+
+def test_limit_counts_archived_receipts(app, build_receipt):
+    add_receipts(build_receipt, 12, days_ago=400)
+    archive.archive_receipts(older_than_days=365)
+    add_receipts(build_receipt, 3, days_ago=1)
+    
+    seen, cursor, has_more = [], '', True
+    while has_more:
+        rows, cursor, has_more = sync(cursor, limit=5)
+        assert len(rows) <= 5
+        seen += rows
+    assert len(seen) == 15
+    assert len({row['receipt_id'] for row in seen}) == 15
+
+
+def test_store_with_only_archived_receipts_syncs(app, build_receipt):
+    add_receipts(build_receipt, 4, days_ago=400)
+    archive.archive_receipts(older_than_days=365)
+    
+    rows, cursor, has_more = sync()
+    assert len(rows) == 4
+    assert not has_more
+    assert sync(cursor)[0] == []